@@ -0,0 +1,311 @@
+"""
+Benchmark of each stage of the conversion pipeline, on synthetic notebooks.
+
+Notebooks are generated along several axes (cell count, code length, number of
+outputs, image size, ANSI tracebacks and markdown size), and every stage is
+timed on its own, followed by the whole conversion and its peak memory.
+
+    python benchmarks/pipeline.py [--runs N] [--scale F] [--only NAME ...]
+                                  [--json results.json] [--compare baseline.json]
+
+Save the results of one commit with `--json`, and pass them to `--compare` on
+another commit to see the relative change of every stage.
+"""
+
+import argparse
+import base64
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from elara.ansi import convert_ansi  # noqa: E402
+from elara.cache import elara_version  # noqa: E402
+from elara.converter import Converter  # noqa: E402
+from elara.fast_notebook import build_notebook  # noqa: E402
+from elara.highlighter import SyntaxHighlighter  # noqa: E402
+from elara.notebook import Notebook  # noqa: E402
+from elara.schema_validator import validate_notebook  # noqa: E402
+from elara.template_renderer import RenderOptions, TemplateRenderer  # noqa: E402
+
+OUTPUT_DIR = ROOT / "benchmarks" / ".output"
+
+# every scenario scales one axis up from the baseline
+BASELINE = dict(
+    cells=50,
+    code_lines=10,
+    outputs=1,
+    image_kb=0,
+    traceback_frames=0,
+    markdown_paragraphs=2,
+)
+SCENARIOS = {
+    "baseline": {},
+    "many-cells": dict(cells=1000),
+    "long-code": dict(code_lines=400),
+    "many-outputs": dict(outputs=20),
+    "huge-output-count": dict(cells=200, outputs=200),
+    "large-images": dict(image_kb=512),
+    "ansi-tracebacks": dict(traceback_frames=40),
+    "large-markdown": dict(markdown_paragraphs=60),
+}
+
+CODE_LINES = [
+    "import numpy as np",
+    "def f(x, y=2):",
+    "    return [i ** y for i in range(x) if i % 3]  # squares",
+    "data = {'a': 1, 'b': [1.5, 2e3], 'c': None}",
+    "for key, value in data.items():",
+    '    print(f"{key}={value!r}")',
+    "class Model(Base):",
+    "    @property",
+    "    def size(self) -> int: return len(self.items)",
+    "result = np.linspace(0, 1, 100).reshape(10, 10).T @ matrix",
+]
+MARKDOWN_PARAGRAPH = (
+    "Some **bold** and *italic* text with `inline code`, a [link](https://example.com) "
+    "and a list:\n\n- first item\n- second item with $x^2$\n\n"
+    "| column | other |\n|---|---|\n| 1 | 2 |\n\n"
+    "```python\nprint('fenced')\n```\n\n"
+)
+TRACEBACK_FRAME = (
+    "\x1b[0;32m~/project/module.py\x1b[0m in \x1b[0;36mfunction\x1b[0;34m(x)\x1b[0m\n"
+    "\x1b[1;32m     10\x1b[0m \x1b[0;32mdef\x1b[0m \x1b[0mfunction\x1b[0m"
+    "\x1b[0;34m(\x1b[0m\x1b[0mx\x1b[0m\x1b[0;34m)\x1b[0m\x1b[0;34m:\x1b[0m\n"
+    "\x1b[0;32m---> 11\x1b[0;31m     \x1b[0;32mreturn\x1b[0m \x1b[0mx\x1b[0m "
+    "\x1b[0;34m/\x1b[0m \x1b[0;36m0\x1b[0m\x1b[0;34m\x1b[0m\x1b[0;34m\x1b[0m\x1b[0m\n"
+)
+
+
+def generate_notebook(
+    cells: int,
+    code_lines: int,
+    outputs: int,
+    image_kb: int,
+    traceback_frames: int,
+    markdown_paragraphs: int,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """
+    Generates a valid nbformat v4 notebook, alternating markdown and code cells.
+    """
+    rng = random.Random(seed)
+    # random bytes don't compress, so the image size is the same in the output
+    image = ""
+    if image_kb:
+        image = base64.b64encode(rng.randbytes(image_kb * 1024)).decode()
+
+    nb_cells = []
+    for i in range(cells):
+        if i % 2 == 0:
+            nb_cells.append(
+                {
+                    "cell_type": "markdown",
+                    "metadata": {},
+                    "source": f"## Section {i}\n\n"
+                    + MARKDOWN_PARAGRAPH * markdown_paragraphs,
+                }
+            )
+            continue
+
+        source = "\n".join(rng.choice(CODE_LINES) for _ in range(code_lines))
+        cell_outputs = []
+        for j in range(outputs):
+            cell_outputs.append(
+                {"output_type": "stream", "name": "stdout", "text": f"line {j}\n" * 5}
+            )
+        if image:
+            cell_outputs.append(
+                {
+                    "output_type": "display_data",
+                    "metadata": {},
+                    "data": {"image/png": image, "text/plain": "<Figure>"},
+                }
+            )
+        if traceback_frames:
+            cell_outputs.append(
+                {
+                    "output_type": "error",
+                    "ename": "ZeroDivisionError",
+                    "evalue": "division by zero",
+                    "traceback": [TRACEBACK_FRAME] * traceback_frames,
+                }
+            )
+        nb_cells.append(
+            {
+                "cell_type": "code",
+                "execution_count": i,
+                "metadata": {},
+                "source": source,
+                "outputs": cell_outputs,
+            }
+        )
+
+    return {
+        "metadata": {"language_info": {"name": "python"}},
+        "nbformat": 4,
+        "nbformat_minor": 4,
+        "cells": nb_cells,
+    }
+
+
+def best_of(runs: int, fn: Callable[[], Any]) -> float:
+    """
+    Returns the fastest of `runs` timings of `fn`, in seconds.
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_scenario(path: Path, runs: int) -> dict[str, Any]:
+    from ansi2html import Ansi2HTMLConverter
+    from markdown_it import MarkdownIt
+
+    from elara.template_renderer import get_source
+
+    source = path.read_text(encoding="utf-8")
+    nb_json = json.loads(source)
+    notebook = Notebook(**nb_json)
+    code = [get_source(c.source) for c in notebook.cells if c.cell_type == "code"]
+    markdown = [
+        get_source(c.source) for c in notebook.cells if c.cell_type == "markdown"
+    ]
+    tracebacks = [
+        "\n".join(o.traceback)
+        for c in notebook.cells
+        if c.cell_type == "code"
+        for o in c.outputs
+        if o.output_type == "error"
+    ]
+
+    # uncached, so that every run measures pygments itself
+    highlighter = SyntaxHighlighter("vs", cache_size=0)
+    md = MarkdownIt()
+    ansi = Ansi2HTMLConverter(dark_bg=False)
+    renderer = TemplateRenderer("vs")
+    options = RenderOptions(path.name, notebook, "sans-serif", "monospace")
+    html = renderer.render(options)
+    output = path.with_suffix(".html")
+    converter = Converter("vs", "sans-serif", "monospace")
+
+    stages = {
+        "json_load": lambda: json.loads(source),
+        "validate": lambda: validate_notebook(nb_json),
+        "models": lambda: Notebook(**nb_json),
+        # what the conversion uses after full schema validation
+        "fast_models": lambda: build_notebook(nb_json),
+        "highlight": lambda: [highlighter.highlight(s) for s in code],
+        "markdown": lambda: [md.render(s) for s in markdown],
+        "ansi2html": lambda: [ansi.convert(s, full=False) for s in tracebacks],
+        # uncached, what the ansi2html filter does on a memo miss
+        "ansi_fast": lambda: [convert_ansi(s) for s in tracebacks],
+        # includes highlighting, markdown and ansi2html again
+        "render": lambda: renderer.render(options),
+        "write": lambda: output.write_text(html, encoding="utf-8"),
+        "total": lambda: converter.convert_to(str(path), str(output), strict=True),
+    }
+    timings = {name: best_of(runs, fn) for name, fn in stages.items()}
+
+    tracemalloc.start()
+    converter.convert_to(str(path), str(output), strict=True)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    size = path.stat().st_size
+    return {
+        "input_bytes": size,
+        "output_bytes": output.stat().st_size,
+        "cells": len(notebook.cells),
+        "stages_s": timings,
+        "throughput_mb_s": size / timings["total"] / 1e6,
+        "cells_per_s": len(notebook.cells) / timings["total"],
+        "peak_memory_mb": peak / 1e6,
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def print_results(name: str, result: dict[str, Any], baseline: dict | None):
+    print(
+        f"{name}: {result['cells']} cells, {result['input_bytes'] / 1e6:.1f} MB in, "
+        f"{result['output_bytes'] / 1e6:.1f} MB out"
+    )
+    for stage, seconds in result["stages_s"].items():
+        line = f"  {stage:<11} {seconds * 1000:9.2f} ms"
+        if baseline is not None and baseline["stages_s"].get(stage):
+            line += f"   {seconds / baseline['stages_s'][stage]:5.2f}x"
+        print(line)
+    print(
+        f"  {result['throughput_mb_s']:.1f} MB/s, {result['cells_per_s']:.0f} cells/s, "
+        f"peak memory {result['peak_memory_mb']:.1f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="multiply the cell count by this"
+    )
+    parser.add_argument(
+        "--only", nargs="+", choices=SCENARIOS, help="run only these scenarios"
+    )
+    parser.add_argument("--json", type=Path, help="write the results to this file")
+    parser.add_argument(
+        "--compare", type=Path, help="results of an earlier run to compare against"
+    )
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["scenarios"]
+
+    OUTPUT_DIR.mkdir(exist_ok=True)
+    results = {}
+    for name in args.only or SCENARIOS:
+        params = BASELINE | SCENARIOS[name]
+        params["cells"] = max(1, int(params["cells"] * args.scale))
+        path = OUTPUT_DIR / f"bench-{name}.ipynb"
+        path.write_text(json.dumps(generate_notebook(**params)), encoding="utf-8")
+
+        results[name] = bench_scenario(path, args.runs)
+        results[name]["params"] = params
+        print_results(name, results[name], baseline and baseline.get(name))
+
+    if args.json:
+        report = {
+            "commit": git_commit(),
+            "version": elara_version(),
+            "python": sys.version.split()[0],
+            "cpu_count": os.cpu_count(),
+            "scenarios": results,
+        }
+        args.json.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
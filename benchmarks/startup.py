@@ -0,0 +1,155 @@
+"""
+Startup time benchmark for the elara CLI.
+
+Times cold invocations of a few commands in fresh interpreters, and checks that
+importing `elara.main` doesn't pull in the conversion pipeline, and that importing
+`elara.converter` doesn't pull in the rendering pipeline.
+
+    python benchmarks/startup.py [--runs N] [--json results.json] [--check]
+
+With `--check`, exits with a non-zero status if a heavy module is imported at
+startup, so that it can be used to catch regressions.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SAMPLE = ROOT / "elara" / "samples" / "mine.ipynb"
+
+# modules only the conversion pipeline needs, `import elara.main` must not import them
+HEAVY_MODULES = [
+    "ansi2html",
+    "concurrent.futures.process",
+    "elara.converter",
+    "elara.template_renderer",
+    "jinja2",
+    "jsonschema",
+    "multiprocessing",
+    "pydantic",
+]
+# modules only rendering needs, `import elara.converter` must not import them so that
+# a render cache hit doesn't pay for them
+RENDER_MODULES = [
+    "ansi2html",
+    "elara.template_renderer",
+    "jinja2",
+    "jsonschema",
+    "pydantic",
+    "pygments",
+]
+
+
+def run_cli(args: list[str]) -> float:
+    """
+    Runs the CLI in a new interpreter and returns the wall time in seconds.
+    """
+    code = f"import sys; sys.argv = ['elara', *{args!r}]; from elara.main import app; app()"
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def imported_modules(module: str, candidates: list[str]) -> list[str]:
+    """
+    The `candidates` imported by importing `module` in a new interpreter.
+    """
+    code = f"import sys, json, {module}; print(json.dumps(list(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = set(json.loads(result.stdout))
+    return [m for m in candidates if m in modules]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--json", type=Path, help="write the results to this file")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="fail if heavy modules load at startup or with the converter",
+    )
+    args = parser.parse_args()
+
+    output_dir = ROOT / "benchmarks" / ".output"
+    output_dir.mkdir(exist_ok=True)
+    commands = {
+        "help": ["--help"],
+        "list-themes": ["list-themes"],
+        "convert-single": [
+            "convert",
+            "--silent",
+            "--no-cache",
+            "--jobs",
+            "1",
+            str(output_dir / SAMPLE.name),
+        ],
+        # the warm up run fills the render cache, the timed ones hit it
+        "convert-cached": [
+            "convert",
+            "--silent",
+            "--jobs",
+            "1",
+            str(output_dir / SAMPLE.name),
+        ],
+    }
+    (output_dir / SAMPLE.name).write_bytes(SAMPLE.read_bytes())
+
+    results = {}
+    for name, cli_args in commands.items():
+        # warm up the OS file cache and the bytecode cache
+        run_cli(cli_args)
+        timings = [run_cli(cli_args) for _ in range(args.runs)]
+        for html in output_dir.glob("*.html"):
+            html.unlink()
+        results[name] = {
+            "median_s": statistics.median(timings),
+            "min_s": min(timings),
+        }
+        print(
+            f"{name:<16} median {results[name]['median_s'] * 1000:7.1f} ms"
+            f"   min {results[name]['min_s'] * 1000:7.1f} ms"
+        )
+
+    heavy = imported_modules("elara.main", HEAVY_MODULES)
+    results["heavy_modules_at_startup"] = heavy
+    if heavy:
+        print(f"heavy modules imported by `import elara.main`: {', '.join(heavy)}")
+    else:
+        print("no heavy modules imported by `import elara.main`")
+
+    rendering = imported_modules("elara.converter", RENDER_MODULES)
+    results["render_modules_with_converter"] = rendering
+    if rendering:
+        print(
+            "rendering modules imported by `import elara.converter`: "
+            + ", ".join(rendering)
+        )
+    else:
+        print("no rendering modules imported by `import elara.converter`")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+    if args.check and (heavy or rendering):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import html
+import re
+import threading
+from functools import lru_cache
+
+# the same as ansi2html's, `A-z` included
+_CSI = re.compile("\033\\[([\\d;:]*)([a-zA-z])")
+_PARAM_SEPARATOR = re.compile("[;:]")
+
+# texts up to this many characters are memoized, tracebacks and error names repeat
+CACHE_MAX_LENGTH = 16 * 1024
+CACHE_SIZE = 256
+
+# SGR codes, named as in ansi2html
+FULL_RESET = 0
+FOREGROUND = 38
+BACKGROUND = 48
+COLOR_256 = 5
+TRUECOLOR = 2
+
+# attribute -> the codes which set it, the first one being its default
+_ATTRIBUTES = (
+    (22, 1, 2),  # intensity
+    (23, 3),  # italic
+    (25, 5, 6),  # blink
+    (24, 4),  # underline
+    (29, 9),  # crossed out
+    (28, 8),  # visibility
+)
+_ATTRIBUTE_OF = {code: i for i, codes in enumerate(_ATTRIBUTES) for code in codes}
+_FG, _BG, _NEGATIVE = len(_ATTRIBUTES), len(_ATTRIBUTES) + 1, len(_ATTRIBUTES) + 2
+_DEFAULT_FG = (39, None)
+_DEFAULT_BG = (49, None)
+# the attributes, the foreground and background colors and the negative flag
+_DEFAULT_STATE = (*(codes[0] for codes in _ATTRIBUTES), _DEFAULT_FG, _DEFAULT_BG, 27)
+
+State = tuple
+
+_fallback = threading.local()
+
+
+def _adjust(state: list, code: int, parameter: str | None = None):
+    if code in _ATTRIBUTE_OF:
+        state[_ATTRIBUTE_OF[code]] = code
+    elif 30 <= code <= 37 or 90 <= code <= 97 or code == 39:
+        state[_FG] = (code, None)
+    elif code == FOREGROUND:
+        state[_FG] = (code, parameter)
+    elif 40 <= code <= 47 or 100 <= code <= 107 or code == 49:
+        state[_BG] = (code, None)
+    elif code == BACKGROUND:
+        state[_BG] = (code, parameter)
+    elif code in (7, 27):
+        state[_NEGATIVE] = code
+
+
+def _css_classes(state: State) -> str:
+    classes = [
+        f"ansi{value}" for value, codes in zip(state, _ATTRIBUTES) if value != codes[0]
+    ]
+    negative = state[_NEGATIVE] == 7
+    for (value, parameter), default, inverted in (
+        (state[_FG], 39, "inv_background"),
+        (state[_BG], 49, "inv_foreground"),
+    ):
+        if value != default:
+            prefix = "inv" if negative else "ansi"
+            suffix = str(value) if parameter is None else f"{value}-{parameter}"
+            classes.append(prefix + suffix)
+        elif negative:
+            classes.append(inverted)
+    return " ".join(classes)
+
+
+@lru_cache(maxsize=4096)
+def _apply_sgr(state: State, params: str) -> tuple[State, str]:
+    """
+    Applies the parameters of an SGR sequence to the state, returns the new state
+    and the classes of the span to open, if any. Follows ansi2html to the letter,
+    including its handling of malformed sequences.
+    """
+    while True:
+        length = len(params)
+        params = params.replace("::", ":").replace(";;", ";")
+        if len(params) == length:
+            break
+    try:
+        codes = [int(x) for x in _PARAM_SEPARATOR.split(params)]
+    except ValueError:
+        codes = [FULL_RESET]
+
+    # everything before the last reset is dropped
+    last_reset = None
+    skip_until = -1
+    for i, code in enumerate(codes):
+        if i <= skip_until:
+            continue
+        if code == FULL_RESET:
+            last_reset = i
+        elif code in (FOREGROUND, BACKGROUND):
+            color_id = codes[i + 1] if i + 1 < len(codes) else -1
+            skip_until = i + (2 if color_id == COLOR_256 else 4)
+
+    new_state = list(state)
+    if last_reset is not None:
+        codes = codes[last_reset + 1 :]
+        new_state = list(_DEFAULT_STATE)
+        if not codes:
+            return _DEFAULT_STATE, ""
+
+    skip_until = -1
+    for i, code in enumerate(codes):
+        if i <= skip_until:
+            continue
+        color_id = codes[i + 1] if i + 1 < len(codes) else -1
+        parameter = None
+        if code in (FOREGROUND, BACKGROUND) and color_id == COLOR_256:
+            if i + 2 >= len(codes):
+                continue
+            parameter = str(codes[i + 2])
+            skip_until = i + 2
+        elif code in (FOREGROUND, BACKGROUND) and color_id == TRUECOLOR:
+            if i + 4 >= len(codes):
+                continue
+            r, g, b = codes[i + 2 : i + 5]
+            color = (code, f"{r:03d}{g:03d}{b:03d}")
+            new_state[_FG if code == FOREGROUND else _BG] = color
+            skip_until = i + 4
+            continue
+        _adjust(new_state, code, parameter)
+
+    new_state = tuple(new_state)
+    return new_state, _css_classes(new_state)
+
+
+def _convert_with_ansi2html(text: str) -> str:
+    converter = getattr(_fallback, "converter", None)
+    if converter is None:
+        from ansi2html import Ansi2HTMLConverter
+
+        # not thread safe, hence one per thread
+        converter = _fallback.converter = Ansi2HTMLConverter(dark_bg=False)
+    return converter.convert(text, full=False)
+
+
+def convert_ansi(text: str) -> str:
+    """
+    Converts ANSI escape sequences into HTML, the same as
+    `Ansi2HTMLConverter(dark_bg=False).convert(text, full=False)` does, in a
+    single pass over the text. Box drawing, hyperlinks and cursor movements are
+    left to ansi2html itself, they're rare in outputs.
+    """
+    if "\033" not in text:
+        return html.escape(text, quote=False)
+    if "\033(" in text or "\033]" in text:
+        return _convert_with_ansi2html(text)
+
+    escaped = html.escape(text, quote=False)
+    parts = []
+    state = _DEFAULT_STATE
+    inside_span = False
+    last_end = 0
+    for match in _CSI.finditer(escaped):
+        parts.append(escaped[last_end : match.start()])
+        last_end = match.end()
+        params, command = match.groups()
+        if command == "A":
+            return _convert_with_ansi2html(text)
+        if command not in "mM":
+            # other sequences are dropped
+            continue
+
+        state, classes = _apply_sgr(state, params)
+        if inside_span:
+            parts.append("</span>")
+            inside_span = False
+        if classes:
+            parts.append(f'<span class="{classes}">')
+            inside_span = True
+
+    parts.append(escaped[last_end:])
+    if inside_span:
+        parts.append("</span>")
+    return "".join(parts)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _convert_cached(text: str) -> str:
+    return convert_ansi(text)
+
+
+def ansi_to_html(text: str) -> str:
+    """
+    `convert_ansi`, memoized for short texts. Plain text is only escaped.
+    """
+    if "\033" not in text:
+        return html.escape(text, quote=False)
+    if len(text) <= CACHE_MAX_LENGTH:
+        return _convert_cached(text)
+    return convert_ansi(text)
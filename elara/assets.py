@@ -0,0 +1,41 @@
+import base64
+import hashlib
+import os
+from pathlib import Path
+
+from elara.fileutils import write_atomic
+
+IMAGE_EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+}
+
+
+class AssetStore:
+    """
+    Writes embedded images into a directory, named after the hash of their contents.
+    Identical images, across cells and notebooks, are only written once.
+    """
+
+    def __init__(self, directory: str | os.PathLike):
+        self.directory = Path(directory)
+        # names known to be on disk, saves a stat call for repeated images
+        self._written: set[str] = set()
+
+    def add(self, data: bytes, extension: str) -> str:
+        """
+        Stores the data and returns its file name inside the assets directory.
+        """
+        name = f"{hashlib.sha256(data).hexdigest()[:32]}.{extension}"
+        if name not in self._written:
+            path = self.directory / name
+            if not path.exists():
+                self.directory.mkdir(parents=True, exist_ok=True)
+                write_atomic(path, data)
+            self._written.add(name)
+
+        return name
+
+    def add_base64(self, data: str, mimetype: str) -> str:
+        return self.add(base64.b64decode(data), IMAGE_EXTENSIONS[mimetype])
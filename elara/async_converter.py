@@ -0,0 +1,166 @@
+import asyncio
+import io
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from json import JSONDecodeError
+from pathlib import Path
+from typing import Any, Generator
+
+from jsonschema import ValidationError
+from pydantic import ValidationError as ModelValidationError
+
+from elara.batch import describe_error
+from elara.converter import Converter
+from elara.errors import (
+    ConversionCancelled,
+    InvalidNotebookError,
+    NotebookNotFoundError,
+)
+from elara.fileutils import get_filename
+
+
+@contextmanager
+def _typed_errors() -> Generator[None, None, None]:
+    """
+    Turns the errors of a conversion into `ElaraError`s.
+    """
+    try:
+        yield
+    except FileNotFoundError as e:
+        raise NotebookNotFoundError(describe_error(e)) from e
+    except (JSONDecodeError, ValidationError, ModelValidationError, TypeError) as e:
+        raise InvalidNotebookError(describe_error(e)) from e
+
+
+class _CancellableOutput(io.StringIO):
+    """
+    An output which stops the conversion writing into it once `cancelled` is set,
+    the check happens every time a chunk is written.
+    """
+
+    def __init__(self, cancelled: threading.Event):
+        super().__init__()
+        self.cancelled = cancelled
+
+    def write(self, s: str) -> int:
+        if self.cancelled.is_set():
+            raise ConversionCancelled("conversion cancelled")
+        return super().write(s)
+
+
+def _render(
+    converter: Converter, source: str, filename: str, cancelled: threading.Event
+) -> str:
+    output = _CancellableOutput(cancelled)
+    with _typed_errors():
+        converter.convert_to(
+            io.StringIO(source), output, strict=True, filename=filename
+        )
+    return output.getvalue()
+
+
+# converters of a worker process, by their options
+_process_converters: dict[str, Converter] = {}
+
+
+def _render_in_process(options: dict[str, Any], source: str, filename: str) -> str:
+    key = repr(sorted(options.items()))
+    converter = _process_converters.get(key)
+    if converter is None:
+        converter = _process_converters[key] = Converter(**options)
+    return _render(converter, source, filename, threading.Event())
+
+
+class AsyncConverter:
+    """
+    Converts notebooks without blocking the event loop, for embedding elara in
+    async web services.
+
+    Files are read and written in the event loop's default executor, rendering
+    runs in `executor`, a thread pool of its own unless one is given. Process
+    pools work too, each worker process builds its own converter. At most
+    `max_concurrency` conversions run at once, the rest wait their turn.
+
+    Cancelling a conversion running in a thread stops it at the next chunk of
+    output, in a process pool it's only stopped if it hasn't started yet. Errors
+    are raised as `elara.errors.ElaraError`s, the constructor raises
+    `ThemeNotFoundError` for unknown themes.
+    """
+
+    def __init__(
+        self,
+        theme_path: str = "vs",
+        font: str = "sans-serif",
+        code_font: str = "monospace",
+        *,
+        executor: Executor | None = None,
+        max_concurrency: int | None = None,
+        **options: Any,
+    ):
+        self.converter = Converter(theme_path, font, code_font, **options)
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="elara"
+        )
+        self._semaphore = (
+            asyncio.Semaphore(max_concurrency) if max_concurrency is not None else None
+        )
+
+    async def convert(
+        self, file: str | os.PathLike, filename: str | None = None
+    ) -> str:
+        """
+        Converts the notebook file, and returns the HTML.
+        """
+        loop = asyncio.get_running_loop()
+        with _typed_errors():
+            source = await loop.run_in_executor(None, Path(file).read_text, "utf-8")
+        return await self.convert_source(source, filename or get_filename(file))
+
+    async def convert_source(self, source: str, filename: str = "notebook") -> str:
+        """
+        Converts the notebook JSON, and returns the HTML. `filename` is the title
+        of the document.
+        """
+        async with self._semaphore or nullcontext():
+            loop = asyncio.get_running_loop()
+            if isinstance(self.executor, ProcessPoolExecutor):
+                return await loop.run_in_executor(
+                    self.executor,
+                    _render_in_process,
+                    self.converter.options,
+                    source,
+                    filename,
+                )
+
+            cancelled = threading.Event()
+            try:
+                return await loop.run_in_executor(
+                    self.executor, _render, self.converter, source, filename, cancelled
+                )
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+    async def convert_to(self, file: str | os.PathLike, output: str | os.PathLike):
+        """
+        Converts the notebook file, and writes the HTML to `output`.
+        """
+        html = await self.convert(file)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, Path(output).write_text, html, "utf-8")
+
+    def close(self):
+        """
+        Shuts down the executor, unless it was passed in.
+        """
+        if self._owns_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def __aenter__(self) -> "AsyncConverter":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,236 @@
+import os
+from dataclasses import dataclass, replace
+from functools import partial
+from typing import Any, Iterator, Sequence
+
+from elara.compress import Compression, compress_file
+from elara.converter import Converter
+from elara.scheduler import (
+    ResourceMeter,
+    ResourceUsage,
+    ScheduledJob,
+    Scheduler,
+    plan_jobs,
+)
+from elara.timings import Timings
+from elara.variants import VariantConverter
+
+# (input notebook, output html) pairs
+Job = tuple[str, str]
+
+
+@dataclass(frozen=True, slots=True)
+class ConversionResult:
+    input_file: str
+    output_file: str
+    error: str | None = None
+    # the outputs of the other variants, with a `VariantConverter`
+    variant_files: tuple[str, ...] = ()
+    # the pages of paginated outputs, of every variant
+    page_files: tuple[str, ...] = ()
+    # `Timings.as_dict()`, only when timings are collected
+    timings: dict[str, Any] | None = None
+    resources: ResourceUsage | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def describe_error(e: Exception) -> str:
+    """
+    Returns a one-line description of the error, for the failure summary.
+    """
+    # jsonschema's str() includes the entire schema, the message alone is enough here
+    message = getattr(e, "message", None) or str(e)
+    return f"{type(e).__name__}: {message}"
+
+
+def convert_file(
+    converter: Converter | VariantConverter,
+    input_file: str,
+    output_file: str,
+    timings: bool = False,
+):
+    """
+    Converts a single notebook and writes the output. Failures are captured in the
+    returned result instead of being raised, so that one bad notebook doesn't stop a batch.
+    """
+    file_timings = Timings(input_file) if timings else None
+    variant_files = tuple(converter.outputs(output_file)[1:])
+    meter = ResourceMeter()
+    error = None
+    try:
+        converter.convert_to(input_file, output_file, strict=True, timings=file_timings)
+    except Exception as e:
+        error = describe_error(e)
+
+    try:
+        size = os.path.getsize(input_file)
+    except OSError:
+        size = 0
+    resources = meter.stop(size, bool(converter.options.get("low_memory")))
+    if error is not None:
+        return ConversionResult(
+            input_file,
+            output_file,
+            error,
+            variant_files=variant_files,
+            resources=resources,
+        )
+
+    return ConversionResult(
+        input_file,
+        output_file,
+        timings=file_timings.as_dict() if file_timings is not None else None,
+        variant_files=variant_files,
+        page_files=tuple(converter.page_files(output_file)),
+        resources=resources,
+    )
+
+
+def low_memory_converter(
+    converter: Converter | VariantConverter,
+) -> Converter | VariantConverter:
+    """
+    A converter with the same options, which reads notebooks cell by cell.
+    """
+    if converter.options.get("low_memory"):
+        return converter
+    return type(converter)(**{**converter.options, "low_memory": True})
+
+
+def compress_result(
+    result: ConversionResult, formats: Sequence[Compression]
+) -> ConversionResult:
+    """
+    Writes the compressed copies of a successful conversion's outputs and pages.
+    """
+    if not result.ok or not formats:
+        return result
+    try:
+        outputs = (result.output_file, *result.variant_files, *result.page_files)
+        for output_file in outputs:
+            compress_file(output_file, formats)
+    except Exception as e:
+        return replace(result, error=describe_error(e))
+    return result
+
+
+# every worker process builds its converter (and hence the template renderer) only once
+_worker_converter: Converter | VariantConverter | None = None
+# and another one for oversized notebooks, when it gets any
+_worker_low_memory_converter: Converter | VariantConverter | None = None
+
+
+def _init_worker(converter_class: type, converter_options: dict[str, Any]):
+    global _worker_converter
+    _worker_converter = converter_class(**converter_options)
+
+
+def _convert_job(
+    job: ScheduledJob, timings: bool = False, compress: Sequence[Compression] = ()
+) -> ConversionResult:
+    global _worker_low_memory_converter
+    converter = _worker_converter
+    if job.low_memory:
+        if _worker_low_memory_converter is None:
+            _worker_low_memory_converter = low_memory_converter(_worker_converter)
+        converter = _worker_low_memory_converter
+    # compressed in the worker too, so it's spread across the pool
+    result = convert_file(converter, job.input_file, job.output_file, timings)
+    return compress_result(result, compress)
+
+
+def _convert_serially(
+    converter: Converter | VariantConverter,
+    jobs: Sequence[ScheduledJob],
+    timings: bool,
+    compress: Sequence[Compression],
+) -> Iterator[ConversionResult]:
+    low_memory = None
+
+    def convert(job: ScheduledJob) -> ConversionResult:
+        nonlocal low_memory
+        job_converter = converter
+        if job.low_memory:
+            if low_memory is None:
+                low_memory = low_memory_converter(converter)
+            job_converter = low_memory
+        return convert_file(job_converter, job.input_file, job.output_file, timings)
+
+    if not compress:
+        for job in jobs:
+            yield convert(job)
+        return
+
+    # zlib and brotli release the GIL, so an output is compressed in a thread
+    # while the next notebook is being converted
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pending = None
+        for job in jobs:
+            result = convert(job)
+            future = pool.submit(compress_result, result, compress)
+            if pending is not None:
+                yield pending.result()
+            pending = future
+        if pending is not None:
+            yield pending.result()
+
+
+def convert_batch(
+    converter: Converter | VariantConverter,
+    jobs: Sequence[Job],
+    n_jobs: int = 1,
+    timings: bool = False,
+    compress: Sequence[Compression] = (),
+    max_memory: int | None = None,
+) -> Iterator[ConversionResult]:
+    """
+    Converts all the jobs, across `n_jobs` worker processes. Conversions run
+    largest notebook first, with at most `max_memory` bytes worth of notebooks
+    being converted at once, as estimated from their size. Notebooks which would
+    need more than that on their own are converted in low memory mode.
+
+    Results are yielded in the same order as the jobs, regardless of the order in
+    which they're converted. A compressed copy of every output is written in each
+    of the `compress` formats.
+    """
+    scheduled = plan_jobs(jobs, max_memory, bool(converter.options.get("low_memory")))
+    if n_jobs <= 1 or len(jobs) <= 1:
+        yield from _convert_serially(converter, scheduled, timings, compress)
+        return
+
+    # multiprocessing is slow to import, and not needed for single file conversions
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    n_workers = min(n_jobs, len(jobs))
+    scheduler = Scheduler(scheduled, max_memory)
+    job_fn = partial(_convert_job, timings=timings, compress=tuple(compress))
+    with ProcessPoolExecutor(
+        max_workers=n_workers,
+        initializer=_init_worker,
+        initargs=(type(converter), converter.options),
+    ) as pool:
+        # only as many jobs as there are workers are submitted, the budget can't
+        # account for the ones waiting in the queue of the pool
+        running = {}
+        # results which finished before the ones of earlier jobs
+        finished: dict[int, ConversionResult] = {}
+        next_index = 0
+        while scheduler.pending or running:
+            while len(running) < n_workers:
+                job = scheduler.take()
+                if job is None:
+                    break
+                running[pool.submit(job_fn, job)] = job
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = running.pop(future)
+                scheduler.finished(job)
+                finished[job.index] = future.result()
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
@@ -0,0 +1,240 @@
+import hashlib
+import os
+from contextlib import contextmanager
+from functools import cache
+from pathlib import Path
+from typing import IO, Any, Container, Generator
+
+from elara.fileutils import open_atomic, write_atomic
+
+DEFAULT_CACHE_SIZE = 512 * 1024 * 1024  # 512 MiB
+# running total of the entry sizes, one change per line, so that processes don't
+# have to walk the entire cache to find out its size
+SIZE_LOG = "size.log"
+# the size log is summed up into a single line once it's this long
+SIZE_LOG_MAX_LINES = 1000
+
+
+def default_cache_dir() -> Path:
+    """
+    Returns the default cache directory, respecting `XDG_CACHE_HOME`.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "elara"
+
+
+@cache
+def elara_version() -> str:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("elarapy")
+    except PackageNotFoundError:
+        # running from a source checkout
+        return "dev"
+
+
+def make_key(*parts: str | bytes) -> str:
+    """
+    Hashes all the parts into a single cache key.
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        # length prefix so that ("ab", "c") and ("a", "bc") don't collide
+        h.update(len(part).to_bytes(8, "little"))
+        h.update(part)
+    return h.hexdigest()
+
+
+class _TooBig(Exception):
+    pass
+
+
+class _ValueHasher:
+    def __init__(self, max_size: int | None):
+        self.h = hashlib.sha256()
+        self.left = max_size
+
+    def _update(self, tag: bytes, data: bytes):
+        if self.left is not None:
+            self.left -= len(data)
+            if self.left < 0:
+                raise _TooBig
+        self.h.update(tag + len(data).to_bytes(8, "little"))
+        self.h.update(data)
+
+    def feed(self, value: Any, exclude: Container[str] = ()):
+        if isinstance(value, str):
+            # characters are a lower bound of the size, checked before encoding
+            if self.left is not None and len(value) > self.left:
+                raise _TooBig
+            self._update(b"s", value.encode("utf-8"))
+        elif isinstance(value, (list, tuple)):
+            self._update(b"l", str(len(value)).encode())
+            for item in value:
+                self.feed(item)
+        elif isinstance(value, dict):
+            self._update(b"d", str(len(value)).encode())
+            for key, item in value.items():
+                self.feed(key)
+                self.feed(item)
+        elif value is None or isinstance(value, (bool, int, float)):
+            self._update(b"v", repr(value).encode())
+        else:
+            # pydantic models, and the dataclasses of `elara.fast_notebook`
+            fields = getattr(type(value), "model_fields", None) or value.__slots__
+            self._update(b"o", type(value).__name__.encode())
+            for name in fields:
+                if name not in exclude:
+                    self.feed(name)
+                    self.feed(getattr(value, name))
+
+
+def content_key(
+    value: Any, exclude: Container[str] = (), max_size: int | None = None
+) -> str | None:
+    """
+    Hashes a model, or plain JSON data, into a cache key without serializing it.
+    `exclude` are top-level fields left out. Returns `None` for values of more
+    than `max_size` bytes of data, as soon as that many have been hashed.
+    """
+    hasher = _ValueHasher(max_size)
+    try:
+        hasher.feed(value, exclude)
+    except _TooBig:
+        return None
+    return hasher.h.hexdigest()
+
+
+class DiskCache:
+    """
+    A content-addressed on-disk cache of text entries, capped at `max_size` bytes.
+    Least recently used entries are evicted first, recency is tracked using file mtimes.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        max_size: int = DEFAULT_CACHE_SIZE,
+        suffix: str = ".html",
+    ):
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.suffix = suffix
+        # total size of the entries, read from the size log on the first write
+        self._size: int | None = None
+
+    def _path(self, key: str) -> Path:
+        # shard by the key prefix to keep directories small
+        return self.directory / key[:2] / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> str | None:
+        f = self.open(key)
+        if f is None:
+            return None
+        with f:
+            return f.read()
+
+    def open(self, key: str) -> IO[str] | None:
+        """
+        Opens the entry for reading, returns `None` on a miss.
+        """
+        path = self._path(key)
+        try:
+            f = open(path, encoding="utf-8")
+            # mark as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return f
+
+    def set(self, key: str, value: str):
+        with self.writer(key) as f:
+            f.write(value)
+
+    @contextmanager
+    def writer(self, key: str) -> Generator[IO[str], None, None]:
+        """
+        Yields a file to write the entry into, the entry is only stored if the block succeeds.
+        """
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if self._size is None:
+            self._size = self._read_size()
+        try:
+            # an entry being replaced, usually by another process
+            old_size = path.stat().st_size
+        except FileNotFoundError:
+            old_size = 0
+
+        # written to a temporary file and moved in place, so that concurrent
+        # processes never read a partially written entry
+        with open_atomic(path) as f:
+            yield f
+
+        change = path.stat().st_size - old_size
+        self._size += change
+        self._log_size(change)
+
+        if self._size > self.max_size:
+            self._evict()
+
+    def _read_size(self) -> int:
+        """
+        The total size of the entries, from the size log. The cache is only walked
+        when there's no log yet, or it's unreadable.
+        """
+        log = self.directory / SIZE_LOG
+        try:
+            changes = log.read_text().split()
+            size = sum(int(change) for change in changes)
+        except (FileNotFoundError, ValueError):
+            changes = ()
+            size = -1
+        if size < 0 or len(changes) > SIZE_LOG_MAX_LINES:
+            if size < 0:
+                size = sum(size for _, _, size in self._entries())
+            # changes appended by other processes in the meantime are lost, the
+            # next eviction corrects the total
+            write_atomic(log, f"{size}\n".encode())
+        return size
+
+    def _log_size(self, change: int):
+        # appends of a single line don't interleave with those of other processes
+        with open(self.directory / SIZE_LOG, "a") as f:
+            f.write(f"{change}\n")
+
+    def _entries(self):
+        """
+        Yields (path, mtime, size) for every entry in the cache.
+        """
+        if not self.directory.exists():
+            return
+        for path in self.directory.glob(f"*/*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # evicted by another process
+                continue
+            yield path, stat.st_mtime, stat.st_size
+
+    def _evict(self):
+        """
+        Removes the least recently used entries until the cache is comfortably under its cap.
+        """
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        size = sum(e[2] for e in entries)
+        target = self.max_size * 0.9
+        for path, _, entry_size in entries:
+            if size <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+
+        self._size = size
+        write_atomic(self.directory / SIZE_LOG, f"{size}\n".encode())
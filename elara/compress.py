@@ -0,0 +1,56 @@
+import gzip
+from enum import Enum
+from pathlib import Path
+
+from elara.fileutils import write_atomic
+
+
+class Compression(str, Enum):
+    """
+    Pre-compressed copies written next to the outputs, for servers which serve
+    them with a `Content-Encoding` directly.
+    """
+
+    gzip = "gzip"
+    brotli = "brotli"
+
+    @property
+    def suffix(self) -> str:
+        return ".gz" if self == Compression.gzip else ".br"
+
+
+def check_available(formats: "list[Compression]"):
+    """
+    Raises `ImportError` if a format needs a package which isn't installed.
+    """
+    if Compression.brotli in formats:
+        try:
+            import brotli  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                "brotli compression needs the brotli package, `pip install brotli`"
+            )
+
+
+def compress(data: bytes, format: Compression) -> bytes:
+    if format == Compression.gzip:
+        # no timestamp, so that unchanged outputs compress to identical files
+        return gzip.compress(data, compresslevel=9, mtime=0)
+
+    import brotli
+
+    return brotli.compress(data, quality=11)
+
+
+def compress_file(path: str, formats: "list[Compression]") -> list[str]:
+    """
+    Writes a compressed copy of the file for every format, returns their paths.
+    """
+    source = Path(path)
+    data = source.read_bytes()
+    written = []
+    for format in formats:
+        target = source.with_name(source.name + format.suffix)
+        write_atomic(target, compress(data, format))
+        written.append(str(target))
+    return written
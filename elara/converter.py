@@ -1,14 +1,62 @@
+import io
+import itertools
 import json
 import logging
+import os
+import shutil
+from contextlib import ExitStack, nullcontext
+from dataclasses import replace
+from datetime import date
+from functools import cached_property, partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator
+from urllib.parse import quote
 
-from jsonschema import ValidationError
-from pygments.styles import get_all_styles
+from elara.cache import DiskCache, elara_version, make_key
+from elara.compress import Compression
+from elara.errors import ThemeNotFoundError
+from elara.fileutils import (
+    FileLike,
+    get_filename,
+    open_file,
+    open_output,
+    pages_dir,
+    write_atomic,
+)
+from elara.schema_validator import ValidationLevel
+from elara.timings import Timings
+from elara.truncation import OutputLimits
 
-from elara.fileutils import FileLike, get_filename, open_file
-from elara.notebook import Notebook
-from elara.schema_validator import validate_notebook
-from elara.template_renderer import RenderOptions, TemplateRenderer
-from elara.themes import extract_theme_data
+# the rendering pipeline (jinja2, pygments, pydantic, jsonschema) is imported when
+# it's first needed, a render cache hit doesn't need it at all
+if TYPE_CHECKING:
+    from elara.fast_notebook import FastNotebook
+    from elara.lazy_notebook import LazyNotebook
+    from elara.notebook import Notebook
+    from elara.template_renderer import RenderOptions, TemplateRenderer
+
+
+def _untimed(stage: str) -> nullcontext:
+    return nullcontext()
+
+
+def _page_number(page: Path) -> int | None:
+    number = page.name.removeprefix("page-").removesuffix(".html")
+    return int(number) if number.isdigit() else None
+
+
+def _is_validation_error(e: Exception) -> bool:
+    # validating imports both, an error can't be either of them otherwise
+    from jsonschema import ValidationError
+    from pydantic import ValidationError as ModelValidationError
+
+    return isinstance(e, (ValidationError, ModelValidationError))
+
+
+def _count_bytes(chunks: Iterator[str], timings: Timings) -> Iterator[str]:
+    for chunk in chunks:
+        timings.bytes_out += len(chunk.encode("utf-8"))
+        yield chunk
 
 
 class Converter:
@@ -18,48 +66,531 @@ class Converter:
     to the suitable style.
     """
 
-    def __init__(self, theme_path: str, font: str, code_font: str):
+    def __init__(
+        self,
+        theme_path: str,
+        font: str,
+        code_font: str,
+        cache_dir: str | None = None,
+        validation: ValidationLevel = ValidationLevel.full,
+        assets_dir: str | None = None,
+        low_memory: bool = False,
+        minify: bool = False,
+        stylesheet: str | None = None,
+        output_limits: OutputLimits | None = None,
+        cells_per_page: int | None = None,
+        on_timings: Callable[[Timings], None] | None = None,
+    ):
+        # kept around so that worker processes can build an identical converter
+        self.options = dict(
+            theme_path=theme_path,
+            font=font,
+            code_font=code_font,
+            cache_dir=cache_dir,
+            validation=validation,
+            assets_dir=assets_dir,
+            low_memory=low_memory,
+            minify=minify,
+            stylesheet=stylesheet,
+            output_limits=output_limits,
+            cells_per_page=cells_per_page,
+        )
         self.font = font
         self.code_font = code_font
-        if theme_path in list(get_all_styles()):
+        self.validation = validation
+        self.low_memory = low_memory
+        self.minify = minify
+        self.output_limits = output_limits
+        # outputs written to a path are split into pages of this many cells
+        self.cells_per_page = cells_per_page
+        # the styles are written here and linked, instead of inlined in every output
+        self.stylesheet = Path(stylesheet) if stylesheet is not None else None
+        # called with the timings of every successful conversion, for metrics
+        self.on_timings = on_timings
+        self.assets_dir = Path(assets_dir) if assets_dir is not None else None
+        self.cache = None
+        fragment_cache = None
+        highlight_cache = None
+        theme_cache = None
+        if cache_dir is not None:
+            # a cached render can't bring back deleted assets, so documents are
+            # always rendered when extracting them, cells are still cached though
+            if assets_dir is None:
+                self.cache = DiskCache(Path(cache_dir) / "renders")
+            fragment_cache = DiskCache(Path(cache_dir) / "fragments")
+            highlight_cache = DiskCache(Path(cache_dir) / "highlight")
+            theme_cache = DiskCache(Path(cache_dir) / "themes", suffix=".json")
+        from pygments.styles import STYLE_MAP, get_all_styles
+
+        # STYLE_MAP has the built-in styles, checking it first saves get_all_styles
+        # from scanning the installed packages for plugin styles
+        css = None
+        if theme_path in STYLE_MAP or theme_path in list(get_all_styles()):
             theme = theme_path
+            self._theme_key = theme_path
         else:
             try:
                 with open_file(theme_path) as f:
-                    theme_json = json.load(f)
-                    theme = extract_theme_data(theme_json)
+                    theme_src = f.read()
             except FileNotFoundError:
-                print(f"Theme path {theme_path} not found!")
-                exit(1)
+                raise ThemeNotFoundError(f"Theme path {theme_path} not found!")
+            from elara.themes import load_theme
+
+            compiled = load_theme(theme_src, theme_cache)
+            theme = compiled.theme
+            css = compiled.css
+            # the contents, so that editing a theme invalidates cached renders
+            self._theme_key = make_key(theme_src)
+
+        self._renderer_args = (
+            theme,
+            fragment_cache,
+            assets_dir,
+            highlight_cache,
+            css,
+            minify,
+            output_limits,
+        )
+        if self.stylesheet is not None:
+            self._write_stylesheet()
 
-        self.renderer = TemplateRenderer(theme)
+    @cached_property
+    def renderer(self) -> "TemplateRenderer":
+        """
+        The template renderer, built on first use. Compiling the templates isn't
+        needed when the output comes from the render cache.
+        """
+        from elara.assets import AssetStore
+        from elara.template_renderer import TemplateRenderer
 
-    def convert(self, file: FileLike):
+        theme, fragment_cache, assets_dir, highlight_cache, css, minify, limits = (
+            self._renderer_args
+        )
+        asset_store = AssetStore(assets_dir) if assets_dir is not None else None
+        return TemplateRenderer(
+            theme, fragment_cache, asset_store, highlight_cache, css, minify, limits
+        )
+
+    def _write_stylesheet(self):
+        """
+        Writes the styles into the shared stylesheet, unless it's already up to
+        date, as every worker process writes it.
+        """
+        css = self.renderer.render_stylesheet(self.font, self.code_font)
+        css = css.encode("utf-8")
         try:
-            with open_file(file) as f:
-                nb_json = json.load(f)
-            validate_notebook(nb_json)
-            nb = Notebook(**nb_json)
-            render_opts = RenderOptions(
-                filename=get_filename(file),
-                notebook=nb,
-                font=self.font,
-                code_font=self.code_font,
-            )
-            return self.renderer.render(render_opts)
+            if self.stylesheet.read_bytes() == css:
+                return
+        except FileNotFoundError:
+            pass
+        self.stylesheet.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.stylesheet, css)
+
+    def convert(
+        self,
+        file: FileLike,
+        strict: bool = False,
+        timings: Timings | None = None,
+        filename: str | None = None,
+    ) -> str | None:
+        """
+        Converts the given notebook into an HTML string. Errors are logged and `None`
+        is returned, unless `strict` is set, in which case they're raised.
+        """
+        output = io.StringIO()
+        if self.convert_to(file, output, strict, timings, filename):
+            return output.getvalue()
+        return None
+
+    def convert_to(
+        self,
+        file: FileLike,
+        output: FileLike,
+        strict: bool = False,
+        timings: Timings | None = None,
+        filename: str | None = None,
+    ) -> bool:
+        """
+        Converts the given notebook and writes the HTML to `output` chunk by chunk,
+        without ever holding the entire document in memory. The output is only opened
+        once the notebook has been parsed and validated.
+
+        Per-stage timings are recorded into `timings` if it's given, or if the
+        converter has an `on_timings` callback. `filename` is the title of the
+        document, it defaults to the name of the notebook file.
+
+        Returns whether the conversion succeeded. Errors are logged, unless `strict`
+        is set, in which case they're raised.
+        """
+        return self._guarded(
+            file, strict, timings, filename, partial(self._convert_to, file, output)
+        )
+
+    def convert_variants(
+        self,
+        file: FileLike,
+        variants: "list[tuple[Converter, FileLike]]",
+        strict: bool = False,
+        timings: Timings | None = None,
+        filename: str | None = None,
+    ) -> bool:
+        """
+        Converts the given notebook once for every (converter, output) pair of
+        `variants`, converters which only differ from this one in their theme,
+        fonts and stylesheet. The notebook is read, validated and its cells are
+        rendered only once, as cells are the same in every theme, the syntax
+        highlighting only refers to the classes of the theme's stylesheet.
+
+        The variants are written side by side, so the outputs are expected to be
+        in the same directory. Otherwise the same as `convert_to`.
+        """
+        return self._guarded(
+            file,
+            strict,
+            timings,
+            filename,
+            partial(self._convert_variants, file, variants),
+        )
+
+    def _guarded(
+        self,
+        file: FileLike,
+        strict: bool,
+        timings: Timings | None,
+        filename: str | None,
+        convert: Callable[[str, Timings | None, Callable], None],
+    ) -> bool:
+        """
+        Runs `convert(filename, timings, measure)` with the error handling and
+        the timings of `convert_to`.
+        """
+        if filename is None:
+            filename = get_filename(file)
+        if timings is None and self.on_timings is not None:
+            timings = Timings(filename)
+        if timings is None:
+            measure = _untimed
+            active = nullcontext()
+        else:
+            measure = timings.stage
+            active = timings.active()
+
+        try:
+            with active:
+                convert(filename, timings, measure)
 
         except FileNotFoundError:
+            if strict:
+                raise
             logging.error(f"File `{file}` not found.")
             # exit(1)
 
-        except ValidationError as ve:
-            logging.error(ve)
-            # exit(1)
-
         except TypeError as te:
+            if strict:
+                raise
             logging.error("notebook construction failed, this should never happen")
             logging.error(te)
 
+        except Exception as e:
+            # schema validation errors, and model validation errors when schema
+            # validation is relaxed and the models catch it
+            if strict or not _is_validation_error(e):
+                raise
+            logging.error(e)
+            # exit(1)
+
+        else:
+            if timings is not None and self.on_timings is not None:
+                self.on_timings(timings)
+            return True
+
+        return False
+
+    def _convert_to(
+        self,
+        file: FileLike,
+        output: FileLike,
+        filename: str,
+        timings: Timings | None,
+        measure: Callable[[str], nullcontext],
+    ):
+        nb = self._read(file, timings, measure)
+        lazy = not isinstance(nb, str)
+        today = date.today()
+        stylesheet_url = self._relative_url(self.stylesheet, output)
+        # a stream can only hold a single document
+        paginate = self.cells_per_page is not None and isinstance(
+            output, (str, os.PathLike)
+        )
+        cache_key = None
+        if self.cache is not None and not paginate:
+            with measure("cache_lookup"):
+                cache_key = self._cache_key(
+                    nb.digest() if lazy else nb, filename, today, stylesheet_url
+                )
+                cached = self.cache.open(cache_key)
+            if cached is not None:
+                if timings is not None:
+                    timings.cache_hit = True
+                    timings.bytes_out = os.fstat(cached.fileno()).st_size
+                with measure("write"), cached, open_output(output) as out:
+                    shutil.copyfileobj(cached, out)
+                return
+
+        if not lazy:
+            nb = self._parse(nb, measure)
+
+        from elara.template_renderer import RenderOptions
+
+        render_opts = RenderOptions(
+            filename=filename,
+            notebook=nb,
+            font=self.font,
+            code_font=self.code_font,
+            date_=today,
+            assets_url=self._relative_url(self.assets_dir, output),
+            stylesheet_url=stylesheet_url,
+        )
+        if paginate:
+            with measure("render"):
+                self._write_pages(render_opts, output, timings)
+            return
+
+        chunks = self.renderer.stream(render_opts)
+        if timings is not None:
+            chunks = _count_bytes(chunks, timings)
+        # rendering is interleaved with writing, so they're measured together.
+        # in low memory mode, this includes reading and validating the cells too
+        with measure("render"), open_output(output) as out:
+            if cache_key is None:
+                out.writelines(chunks)
+            else:
+                with self.cache.writer(cache_key) as cache_out:
+                    for chunk in chunks:
+                        out.write(chunk)
+                        cache_out.write(chunk)
+
+    def _read(
+        self, file: FileLike, timings: Timings | None, measure: Callable
+    ) -> "str | LazyNotebook":
+        """
+        Reads the notebook source, or opens it cell by cell in low memory mode.
+        """
+        # streams can only be read once, so they're always read eagerly
+        if self.low_memory and isinstance(file, (str, os.PathLike)):
+            from elara.lazy_notebook import LazyNotebook
+
+            if timings is not None:
+                timings.bytes_in = os.path.getsize(file)
+            return LazyNotebook(file, self.validation)
+
+        with measure("read"), open_file(file) as f:
+            nb_src = f.read()
+        if timings is not None:
+            timings.bytes_in = len(nb_src.encode("utf-8"))
+        return nb_src
+
+    def _parse(self, nb_src: str, measure: Callable) -> "Notebook | FastNotebook":
+        from elara.fast_notebook import build_notebook
+        from elara.notebook import Notebook
+        from elara.schema_validator import validate_notebook
+
+        with measure("parse"):
+            nb_json = json.loads(nb_src)
+        del nb_src
+        with measure("validate"):
+            validate_notebook(nb_json, self.validation)
+        with measure("models"):
+            if self.validation == ValidationLevel.full:
+                # the schema has checked everything the models would
+                return build_notebook(nb_json)
+            return Notebook(**nb_json)
+
+    def _convert_variants(
+        self,
+        file: FileLike,
+        variants: "list[tuple[Converter, FileLike]]",
+        filename: str,
+        timings: Timings | None,
+        measure: Callable[[str], nullcontext],
+    ):
+        nb = self._read(file, timings, measure)
+        if isinstance(nb, str):
+            nb = self._parse(nb, measure)
+        from elara.template_renderer import RenderOptions
+
+        today = date.today()
+        # the assets are linked from the cells, which are shared
+        assets_url = self._relative_url(self.assets_dir, variants[0][1])
+        options = [
+            RenderOptions(
+                filename=filename,
+                notebook=nb,
+                font=converter.font,
+                code_font=converter.code_font,
+                date_=today,
+                assets_url=assets_url,
+                stylesheet_url=converter._relative_url(converter.stylesheet, output),
+            )
+            for converter, output in variants
+        ]
+        if self.cells_per_page is not None:
+            # pages are rendered one at a time, cells are rendered for each
+            # variant then, from the fragment cache if there's one
+            with measure("render"):
+                for (converter, output), opts in zip(variants, options):
+                    converter._write_pages(opts, output, timings)
+            return
+
+        fragments = self.renderer.render_cells(options[0])
+        streams = [
+            converter.renderer.stream(opts, cells)
+            for (converter, _), opts, cells in zip(
+                variants, options, itertools.tee(fragments, len(variants))
+            )
+        ]
+        with measure("render"), ExitStack() as stack:
+            pending = [
+                (stream, stack.enter_context(open_output(output)))
+                for stream, (_, output) in zip(streams, variants)
+            ]
+            # the documents are written in lockstep, every one of them renders
+            # the same template over the same cells, so the fragments tee holds
+            # on to between them stay few
+            while pending:
+                for stream, out in list(pending):
+                    chunk = next(stream, None)
+                    if chunk is None:
+                        pending.remove((stream, out))
+                        continue
+                    out.write(chunk)
+                    if timings is not None:
+                        timings.bytes_out += len(chunk.encode("utf-8"))
+
+    def _write_pages(
+        self,
+        options: "RenderOptions",
+        output: str | os.PathLike,
+        timings: Timings | None,
+    ):
+        """
+        Writes the notebook as pages of `cells_per_page` cells into its pages
+        directory, one page at a time, and `output` as the index page linking them.
+        """
+        from elara.template_renderer import Heading, page_filename
+
+        directory = pages_dir(output)
+        directory.mkdir(parents=True, exist_ok=True)
+        # the URLs are relative to the pages, which are a directory deeper
+        first_page = directory / page_filename(1)
+        page_options = replace(
+            options,
+            assets_url=self._relative_url(self.assets_dir, first_page),
+            stylesheet_url=self._relative_url(self.stylesheet, first_page),
+        )
+        index_url = self._relative_url(Path(output), first_page)
+        toc: list[Heading] = []
+        n_pages = 0
+        for number, html in self.renderer.render_pages(
+            page_options, self.cells_per_page, index_url, toc
+        ):
+            data = html.encode("utf-8")
+            write_atomic(directory / page_filename(number), data)
+            if timings is not None:
+                timings.bytes_out += len(data)
+            n_pages = number
+
+        # left over from a longer version of the notebook, compressed copies too
+        for page in directory.glob("page-*.html"):
+            number = _page_number(page)
+            if number is None or number > n_pages:
+                page.unlink()
+                for compression in Compression:
+                    compressed = page.with_name(page.name + compression.suffix)
+                    compressed.unlink(missing_ok=True)
+
+        pages_url = self._relative_url(directory, output)
+        page_urls = [f"{pages_url}/{page_filename(n)}" for n in range(1, n_pages + 1)]
+        index = self.renderer.render_index(options, toc, page_urls)
+        if timings is not None:
+            timings.bytes_out += len(index.encode("utf-8"))
+        with open_output(output) as out:
+            out.write(index)
+
+    def _relative_url(self, path: Path | None, output: FileLike) -> str | None:
+        """
+        URL of `path` relative to the output file, used to link the assets
+        directory and the shared stylesheet.
+        """
+        if path is None:
+            return None
+        if isinstance(output, (str, os.PathLike)):
+            output_dir = Path(output).absolute().parent
+        else:
+            # a stream, relative to the working directory then
+            output_dir = Path.cwd()
+
+        relpath = os.path.relpath(path.absolute(), output_dir)
+        return quote(Path(relpath).as_posix())
+
+    def outputs(self, output: str) -> list[str]:
+        """
+        Paths of the outputs a conversion into `output` writes, see `VariantConverter`.
+        """
+        return [output]
+
+    def page_files(self, output: str) -> list[str]:
+        """
+        Paths of the pages the last conversion into `output` wrote, in order. None
+        unless paginating.
+        """
+        if self.cells_per_page is None:
+            return []
+        pages = [
+            (number, page)
+            for page in pages_dir(output).glob("page-*.html")
+            if (number := _page_number(page)) is not None
+        ]
+        return [str(page) for _, page in sorted(pages)]
+
+    @property
+    def options_key(self) -> str:
+        """
+        Key of the options which affect the output, everything but the notebook.
+        """
+        return make_key(
+            elara_version(),
+            self._theme_key,
+            self.font,
+            self.code_font,
+            str(self.assets_dir),
+            str(self.minify),
+            str(self.stylesheet),
+            repr(self.output_limits),
+            str(self.cells_per_page),
+        )
+
+    def _cache_key(
+        self, source: str, filename: str, today: date, stylesheet_url: str | None
+    ) -> str:
+        """
+        Cache key of a render, covers everything that ends up in the output.
+        `source` is the notebook source, or its digest in low memory mode.
+        """
+        return make_key(
+            elara_version(),
+            self._theme_key,
+            self.font,
+            self.code_font,
+            str(self.minify),
+            repr(self.output_limits),
+            # all three are rendered in the document header
+            filename,
+            today.isoformat(),
+            str(stylesheet_url),
+            source,
+        )
+
 
 if __name__ == "__main__":
     c = Converter("nord", "gf:Oswald", "gf:Cascadia Mono")
@@ -0,0 +1,28 @@
+class ElaraError(Exception):
+    """
+    Base class of the errors raised by elara.
+    """
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+
+class ThemeNotFoundError(ElaraError):
+    """
+    The theme is neither a pygments style nor an existing theme file.
+    """
+
+
+class NotebookNotFoundError(ElaraError):
+    pass
+
+
+class InvalidNotebookError(ElaraError):
+    """
+    The notebook isn't valid JSON, or doesn't match the nbformat schema.
+    """
+
+
+class ConversionCancelled(ElaraError):
+    pass
@@ -0,0 +1,155 @@
+import json
+from dataclasses import dataclass
+from functools import cache
+from typing import TYPE_CHECKING, Any, Optional, Union
+
+from elara.notebook import Cell, Metadata, MimeBundle, Output, Source
+
+if TYPE_CHECKING:
+    from pydantic import TypeAdapter
+
+# Plain dataclasses mirroring the models of `elara.notebook`, built straight from
+# the JSON without any validation. Only meant for notebooks which passed the full
+# nbformat schema, which already checks everything the models would.
+
+
+def _as_dict(obj: Any) -> dict[str, Any]:
+    return {name: getattr(obj, name) for name in obj.__slots__}
+
+
+class _Dumpable:
+    __slots__ = ()
+
+    def model_dump_json(self, exclude: set[str] | None = None) -> str:
+        """
+        JSON of the fields, the counterpart of pydantic's method of the same name.
+        """
+        data = _as_dict(self)
+        for name in exclude or ():
+            data.pop(name, None)
+        return json.dumps(data, default=_as_dict, separators=(",", ":"))
+
+
+@dataclass(slots=True)
+class ExecuteResult(_Dumpable):
+    data: MimeBundle
+    metadata: Metadata
+    execution_count: Optional[int]
+    output_type: str = "execute_result"
+
+
+@dataclass(slots=True)
+class DisplayData(_Dumpable):
+    data: MimeBundle
+    metadata: Metadata
+    output_type: str = "display_data"
+
+
+@dataclass(slots=True)
+class Stream(_Dumpable):
+    name: str
+    text: Source
+    output_type: str = "stream"
+
+
+@dataclass(slots=True)
+class Error(_Dumpable):
+    ename: str
+    evalue: str
+    traceback: list[str]
+    output_type: str = "error"
+
+
+FastOutput = Union[ExecuteResult, DisplayData, Stream, Error]
+
+
+@dataclass(slots=True)
+class MarkdownCell(_Dumpable):
+    metadata: Metadata
+    source: Source
+    id: Optional[str] = None
+    cell_type: str = "markdown"
+
+
+@dataclass(slots=True)
+class CodeCell(_Dumpable):
+    metadata: Metadata
+    source: Source
+    outputs: list[FastOutput]
+    execution_count: Optional[int]
+    id: Optional[str] = None
+    cell_type: str = "code"
+
+
+FastCell = Union[MarkdownCell, CodeCell]
+
+
+@dataclass(slots=True)
+class FastNotebook:
+    metadata: Metadata
+    nbformat_minor: int
+    nbformat: int
+    cells: list[FastCell]
+
+
+@cache
+def _output_adapter() -> "TypeAdapter":
+    from pydantic import TypeAdapter
+
+    return TypeAdapter(Output)
+
+
+@cache
+def _cell_adapter() -> "TypeAdapter":
+    from pydantic import TypeAdapter
+
+    return TypeAdapter(Cell)
+
+
+def build_output(output: dict[str, Any]) -> FastOutput:
+    output_type = output["output_type"]
+    if output_type == "stream":
+        return Stream(output["name"], output["text"])
+    if output_type == "display_data":
+        return DisplayData(output["data"], output["metadata"])
+    if output_type == "execute_result":
+        return ExecuteResult(
+            output["data"], output["metadata"], output["execution_count"]
+        )
+    if output_type == "error":
+        return Error(output["ename"], output["evalue"], output["traceback"])
+    # the schema allows unrecognized outputs, the models reject them with a
+    # proper validation error
+    return _output_adapter().validate_python(output)
+
+
+def build_cell(cell: dict[str, Any]) -> FastCell:
+    """
+    Builds a cell which has been validated against the full schema.
+    """
+    cell_type = cell["cell_type"]
+    if cell_type == "markdown":
+        return MarkdownCell(cell["metadata"], cell["source"], cell.get("id"))
+    if cell_type == "code":
+        return CodeCell(
+            cell["metadata"],
+            cell["source"],
+            [build_output(output) for output in cell["outputs"]],
+            cell["execution_count"],
+            cell.get("id"),
+        )
+    # raw and unrecognized cells, same as above
+    return _cell_adapter().validate_python(cell)
+
+
+def build_notebook(notebook: dict[str, Any]) -> FastNotebook:
+    """
+    Builds a notebook which has been validated against the full schema, a few
+    times faster than `elara.notebook.Notebook(**notebook)`.
+    """
+    return FastNotebook(
+        notebook["metadata"],
+        notebook["nbformat_minor"],
+        notebook["nbformat"],
+        [build_cell(cell) for cell in notebook["cells"]],
+    )
@@ -1,10 +1,16 @@
+import glob
 import os
+import stat
+import tempfile
 from contextlib import contextmanager
+from functools import cache
 from pathlib import Path
-from typing import IO, Generator
+from typing import IO, Generator, Iterable, Iterator
 
 FileLike = str | Path | os.PathLike | IO
 
+GLOB_CHARS = "*?["
+
 
 @contextmanager
 def open_file(file: FileLike, mode="r", encoding="utf-8") -> Generator[IO, None, None]:
@@ -23,3 +29,125 @@ def get_filename(file: FileLike) -> str:
     else:
         # it's a path
         return Path(file).stem
+
+
+def _glob_root(pattern: str) -> Path:
+    """
+    The directory a glob pattern starts matching from, its parts before the first
+    wildcard.
+    """
+    parts = []
+    for part in Path(pattern).parts:
+        if any(c in part for c in GLOB_CHARS):
+            break
+        parts.append(part)
+    return Path(*parts) if parts else Path(".")
+
+
+def _find_in_dir(directory: Path) -> Iterator[Path]:
+    for notebook in sorted(directory.rglob("*.ipynb")):
+        # jupyter's autosaves
+        if ".ipynb_checkpoints" not in notebook.parts:
+            yield notebook
+
+
+def expand_notebooks(
+    inputs: Iterable[str | os.PathLike],
+) -> Iterator[tuple[Path, Path]]:
+    """
+    Expands files, directories (searched recursively) and glob patterns into
+    notebooks. Yields (notebook, path relative to the input it came from), so
+    that the layout of the input can be mirrored in the output.
+    """
+    for input_ in map(os.fspath, inputs):
+        if any(c in input_ for c in GLOB_CHARS):
+            root = _glob_root(input_)
+            matches = (Path(m) for m in sorted(glob.glob(input_, recursive=True)))
+        else:
+            path = Path(input_)
+            if not path.is_dir():
+                yield path, Path(path.name)
+                continue
+            root = path
+            matches = iter([path])
+
+        for match in matches:
+            if match.is_dir():
+                for notebook in _find_in_dir(match):
+                    yield notebook, notebook.relative_to(root)
+            elif match.suffix == ".ipynb":
+                yield match, match.relative_to(root)
+
+
+@cache
+def _umask() -> int:
+    # there's no way to read it without setting it
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+def _file_mode(path: Path) -> int:
+    """
+    The permissions of the file being replaced, or the ones `open` would create
+    the file with.
+    """
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_umask()
+
+
+@contextmanager
+def open_atomic(path: str | os.PathLike, mode: str = "w") -> Generator[IO, None, None]:
+    """
+    Opens a temporary file next to `path`, which is moved in place once the block
+    exits without an error, and deleted otherwise. Concurrent readers (and
+    writers) never see a partially written file.
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        encoding = None if "b" in mode else "utf-8"
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            yield f
+        # mkstemp creates the file readable by its owner only
+        os.chmod(tmp_path, _file_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def write_atomic(path: Path, data: bytes):
+    """
+    Writes the data to a temporary file and moves it in place, see `open_atomic`.
+    """
+    with open_atomic(path, "wb") as f:
+        f.write(data)
+
+
+@contextmanager
+def open_output(file: FileLike) -> Generator[IO, None, None]:
+    """
+    Opens `file` for writing text. Paths are written atomically, so that a
+    conversion failing halfway leaves the previous output, or none, instead of a
+    truncated one. Streams are written as they are.
+    """
+    if hasattr(file, "write"):
+        yield file
+    else:
+        with open_atomic(file) as f:
+            yield f
+
+
+def pages_dir(output: str | os.PathLike) -> Path:
+    """
+    The directory the pages of a paginated output are written into, next to its
+    index page.
+    """
+    output = Path(output)
+    return output.with_name(output.stem + "_pages")
@@ -1,17 +1,51 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
 from pygments import highlight
 from pygments.formatters import HtmlFormatter
-from pygments.lexers.python import PythonLexer
 from pygments.styles import get_style_by_name
+from pygments.util import ClassNotFound
 
+from elara.cache import DiskCache, make_key
+from elara.errors import ThemeNotFoundError
+from elara.lexers import DEFAULT_LANGUAGE, LexerRegistry, cell_language
 from elara.themes import Theme, extract_theme_data
+from elara.timings import count
+
+# highlighted sources kept in memory, imports and boilerplate repeat a lot
+HIGHLIGHT_CACHE_SIZE = 4096
+
+
+@dataclass(slots=True)
+class HighlightStats:
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / total if total else 0.0
 
 
 class SyntaxHighlighter:
     """
-    Syntax highlighting for python, renders HTML.
+    Syntax highlighting for code cells, renders HTML. Lexers come from `lexers`,
+    which can be shared between highlighters.
+
+    Highlighted sources are memoized in an LRU cache of `cache_size` entries
+    (0 turns it off), keyed by the source and the style, and backed by
+    `disk_cache` when it's given so that they survive across runs.
     """
 
-    def __init__(self, theme: Theme | str):
+    def __init__(
+        self,
+        theme: Theme | str,
+        cache_size: int = HIGHLIGHT_CACHE_SIZE,
+        disk_cache: DiskCache | None = None,
+        lexers: LexerRegistry | None = None,
+    ):
         if isinstance(theme, Theme):
             self.theme = theme
             self.formatter = HtmlFormatter(
@@ -24,22 +58,60 @@ class SyntaxHighlighter:
                     cssclass="highlight", style=get_style_by_name(theme)
                 )
 
-            except Exception:
-                # theme not found
-                print(f"Theme {theme} not found!")
-                exit(1)
+            except ClassNotFound:
+                raise ThemeNotFoundError(f"Theme {theme} not found!")
 
         else:
-            print(f"Unknown {theme=} passed")
-            exit(1)
+            raise TypeError(f"Unknown {theme=} passed")
 
-        self.lexer = PythonLexer()
+        self.lexers = lexers if lexers is not None else LexerRegistry()
 
-    def highlight(self, source: str):
+        self.cache_size = cache_size
+        self.disk_cache = disk_cache
+        self.stats = HighlightStats()
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        # the server highlights from several threads at once
+        self._lock = threading.Lock()
+        style_key = theme.model_dump_json() if isinstance(theme, Theme) else theme
+        self._key_prefix = make_key("highlight", style_key)
+
+    def highlight(self, source: str, language: str = DEFAULT_LANGUAGE):
         """
         Injects span tags between the source with appropriate class names for styles.
+        `language` is the notebook's, cell magics can override it.
         """
-        return highlight(source, self.lexer, self.formatter)
+        language = cell_language(source, language)
+        if self.cache_size <= 0 and self.disk_cache is None:
+            return highlight(source, self.lexers.get(language), self.formatter)
+
+        key = make_key(self._key_prefix, language, source)
+        with self._lock:
+            html = self._cache.get(key)
+            if html is not None:
+                self._cache.move_to_end(key)
+                self.stats.hits += 1
+        if html is not None:
+            count("highlight_cache_hit")
+            return html
+
+        if self.disk_cache is not None:
+            html = self.disk_cache.get(key)
+        if html is not None:
+            self.stats.disk_hits += 1
+            count("highlight_cache_hit")
+        else:
+            html = highlight(source, self.lexers.get(language), self.formatter)
+            self.stats.misses += 1
+            count("highlight_cache_miss")
+            if self.disk_cache is not None:
+                self.disk_cache.set(key, html)
+
+        if self.cache_size > 0:
+            with self._lock:
+                self._cache[key] = html
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return html
 
 
 if __name__ == "__main__":
@@ -0,0 +1,270 @@
+import hashlib
+import json
+import os
+import re
+from functools import cache
+from typing import IO, TYPE_CHECKING, Any, Container, Iterator
+
+from elara.fast_notebook import FastCell, build_cell
+from elara.notebook import Cell
+from elara.schema_validator import ValidationLevel, validate_cell, validate_notebook
+
+if TYPE_CHECKING:
+    from pydantic import TypeAdapter
+
+# characters read from the file at a time
+CHUNK_SIZE = 1024 * 1024
+
+_WHITESPACE = " \t\n\r"
+_decoder = json.JSONDecoder()
+# what `_JSONScanner.skip` looks for outside of strings
+_STRUCTURE = re.compile(r'["\[\]{}]')
+
+
+@cache
+def _cell_adapter() -> "TypeAdapter":
+    from pydantic import TypeAdapter
+
+    # building the adapter isn't free, only done when a notebook is read lazily
+    return TypeAdapter(Cell)
+
+
+class _JSONScanner:
+    """
+    Incrementally decodes JSON from a file, value by value. Only the value being
+    decoded is held in memory, instead of the entire document.
+    """
+
+    def __init__(self, f: IO[str]):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, min_size: int = CHUNK_SIZE) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(max(min_size, CHUNK_SIZE))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """
+        Returns the next non-whitespace character without consuming it.
+        """
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or not self._fill():
+                break
+
+        if self.pos >= len(self.buf):
+            raise self._end_of_file()
+        return self.buf[self.pos]
+
+    def expect(self, chars: str) -> str:
+        """
+        Consumes the next character, which must be one of `chars`.
+        """
+        char = self.peek()
+        if char not in chars:
+            raise json.JSONDecodeError(f"Expected one of {chars!r}", self.buf, self.pos)
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # grow the buffer geometrically, so that a huge value isn't
+                # re-scanned once per chunk
+                if not self._fill(len(self.buf) - self.pos):
+                    raise
+                continue
+
+            if end == len(self.buf) and self._fill():
+                # a number at the end of the buffer might continue in the next chunk
+                continue
+
+            self.pos = end
+            return value
+
+    def _end_of_file(self) -> json.JSONDecodeError:
+        return json.JSONDecodeError("Unexpected end of file", self.buf, self.pos)
+
+    def _string_end(self) -> int | None:
+        """
+        Index of the quote closing the string being skipped, `None` if it isn't
+        in the buffer.
+        """
+        buf = self.buf
+        while True:
+            end = buf.find('"', self.pos)
+            if end == -1:
+                return None
+            # an odd number of backslashes escapes the quote
+            start = end
+            while start > self.pos and buf[start - 1] == "\\":
+                start -= 1
+            if (end - start) % 2 == 0:
+                return end
+            self.pos = end + 1
+
+    def skip(self):
+        """
+        Consumes the next value without decoding it, only looking for where it
+        ends. Much cheaper than decoding big values, but doesn't notice malformed
+        ones.
+        """
+        if self.peek() not in '"[{':
+            # numbers and literals are small
+            self.value()
+            return
+
+        depth = 0
+        in_string = False
+        while True:
+            if in_string:
+                end = self._string_end()
+                if end is None:
+                    # keeps the backslashes at the end, which may escape a quote
+                    # at the start of the next chunk
+                    run = len(self.buf) - len(self.buf.rstrip("\\"))
+                    self.pos = max(self.pos, len(self.buf) - run)
+                    if not self._fill():
+                        raise self._end_of_file()
+                    continue
+                self.pos = end + 1
+                in_string = False
+            else:
+                match = _STRUCTURE.search(self.buf, self.pos)
+                if match is None:
+                    # nothing in the rest of the buffer matters
+                    self.pos = len(self.buf)
+                    if not self._fill():
+                        raise self._end_of_file()
+                    continue
+                char = match.group()
+                self.pos = match.end()
+                if char == '"':
+                    in_string = True
+                    continue
+                elif char in "[{":
+                    depth += 1
+                    continue
+                depth -= 1
+            if depth == 0:
+                return
+
+    def items(
+        self, array_key: str, skip: Container[str] = ()
+    ) -> Iterator[tuple[str, Any]]:
+        """
+        Yields the (key, value) pairs of the top-level object. The array under
+        `array_key` is yielded item by item, as (array_key, item) pairs. The
+        values of the `skip` keys are skipped over without being decoded.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            return
+
+        while True:
+            key = self.value()
+            self.expect(":")
+            if key in skip:
+                self.skip()
+            elif key == array_key and self.peek() == "[":
+                self.expect("[")
+                if self.peek() == "]":
+                    self.expect("]")
+                else:
+                    while True:
+                        yield key, self.value()
+                        if self.expect(",]") == "]":
+                            break
+            else:
+                yield key, self.value()
+
+            if self.expect(",}") == "}":
+                return
+
+
+def read_cells(path: str | os.PathLike) -> Iterator[dict[str, Any]]:
+    """
+    Yields the cells of a notebook one at a time, as they're decoded, without
+    validating them.
+    """
+    with open(path, encoding="utf-8") as f:
+        for key, value in _JSONScanner(f).items("cells"):
+            if key == "cells":
+                yield value
+
+
+class LazyNotebook:
+    """
+    A notebook read from disk cell by cell while iterating over `cells`, so that
+    at most one cell (and its outputs) is held in memory at a time.
+
+    Cells are validated individually, the rest of the notebook is validated
+    once all the cells have been read.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        validation: ValidationLevel = ValidationLevel.full,
+    ):
+        self.path = path
+        self.validation = validation
+        self._metadata: dict[str, Any] | None = None
+
+    @property
+    def metadata(self) -> dict[str, Any]:
+        """
+        The notebook metadata, read on first access. Jupyter writes it after the
+        cells, which are skipped over without decoding them.
+        """
+        if self._metadata is None:
+            self._metadata = {}
+            with open(self.path, encoding="utf-8") as f:
+                for key, value in _JSONScanner(f).items("cells", skip={"cells"}):
+                    if key == "metadata":
+                        if isinstance(value, dict):
+                            self._metadata = value
+                        break
+        return self._metadata
+
+    def digest(self) -> str:
+        """
+        Hash of the file contents, read in chunks.
+        """
+        h = hashlib.sha256()
+        with open(self.path, "rb") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                h.update(chunk)
+        return h.hexdigest()
+
+    @property
+    def cells(self) -> Iterator[Cell | FastCell]:
+        header: dict[str, Any] = {}
+        with open(self.path, encoding="utf-8") as f:
+            for key, value in _JSONScanner(f).items("cells"):
+                if key != "cells":
+                    header[key] = value
+                    continue
+
+                validate_cell(value, self.validation)
+                if self.validation == ValidationLevel.full:
+                    yield build_cell(value)
+                else:
+                    yield _cell_adapter().validate_python(value)
+
+        # everything except the cells, which have been validated already
+        header.setdefault("cells", [])
+        validate_notebook(header, self.validation)
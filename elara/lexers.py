@@ -0,0 +1,111 @@
+import threading
+from typing import Any
+
+from pygments.lexer import Lexer
+from pygments.lexers import get_lexer_by_name
+from pygments.lexers.python import PythonLexer
+from pygments.lexers.special import TextLexer
+from pygments.util import ClassNotFound
+
+DEFAULT_LANGUAGE = "python"
+
+# kernel language names pygments doesn't know, or would pick the wrong lexer for.
+# the ipython lexers only exist when IPython is installed, plain python is used
+# instead so that the output doesn't depend on it
+LANGUAGE_ALIASES = {
+    "ipython": "python",
+    "ipython2": "python",
+    "ipython3": "python",
+    "python2": "python",
+    "python3": "python",
+    "sh": "bash",
+    "shell": "bash",
+    "js": "javascript",
+}
+
+# IPython cell magics which switch the language of a cell, `%%name`
+CELL_MAGICS = {
+    "bash": "bash",
+    "sh": "bash",
+    "sql": "sql",
+    "html": "html",
+    "javascript": "javascript",
+    "js": "javascript",
+    "latex": "latex",
+    "markdown": "markdown",
+    "perl": "perl",
+    "ruby": "ruby",
+    "svg": "xml",
+}
+
+
+def _lookup(mapping: Any, *keys: str) -> Any:
+    for key in keys:
+        if not isinstance(mapping, dict):
+            return None
+        mapping = mapping.get(key)
+    return mapping
+
+
+def notebook_language(metadata: dict[str, Any]) -> str:
+    """
+    The language of a notebook, from its `language_info` or kernelspec metadata.
+    Defaults to python, as most notebooks without metadata are.
+    """
+    for keys in (
+        ("language_info", "pygments_lexer"),
+        ("language_info", "name"),
+        ("kernelspec", "language"),
+    ):
+        language = _lookup(metadata, *keys)
+        if isinstance(language, str) and language:
+            language = language.lower()
+            return LANGUAGE_ALIASES.get(language, language)
+    return DEFAULT_LANGUAGE
+
+
+def cell_language(source: str, language: str) -> str:
+    """
+    The language of a code cell, which is the notebook's unless a cell magic
+    like `%%sql` or `%%bash` switches it.
+    """
+    if language != "python" or not source.startswith("%%"):
+        return language
+    words = source[2:].split("\n", 1)[0].split()
+    if words[:1] == ["script"] and len(words) > 1:
+        # `%%script bash`, or with the path of the interpreter
+        words = [words[1].rsplit("/", 1)[-1]]
+    if not words:
+        return language
+    return CELL_MAGICS.get(words[0], language)
+
+
+def _create_lexer(language: str) -> Lexer:
+    if language == "python":
+        return PythonLexer()
+    try:
+        return get_lexer_by_name(language)
+    except ClassNotFound:
+        # better plain than highlighted as some other language
+        return TextLexer()
+
+
+class LexerRegistry:
+    """
+    Lexers by language name, each one created once on first use. Looking a lexer
+    up in pygments by name imports lexer modules and can take a while, far too
+    long to do for every cell.
+    """
+
+    def __init__(self):
+        self._lexers: dict[str, Lexer] = {}
+        self._lock = threading.Lock()
+
+    def get(self, language: str) -> Lexer:
+        lexer = self._lexers.get(language)
+        if lexer is None:
+            lexer = _create_lexer(language)
+            with self._lock:
+                # another thread may have created one in the meantime
+                lexer = self._lexers.setdefault(language, lexer)
+        return lexer
@@ -1,12 +1,26 @@
+import json
+import os
 from pathlib import Path
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated, Container, Iterable, Optional
 
 import typer
-from pygments.styles import get_all_styles
 from rich import print
-from rich.progress import BarColumn, Progress, SpinnerColumn, TextColumn
 
-from elara.converter import Converter
+# only lightweight modules are imported here, the conversion pipeline (jinja2,
+# pygments, pydantic, jsonschema...) is imported by the commands which need it
+from elara.cache import default_cache_dir, make_key
+from elara.compress import Compression
+from elara.scheduler import parse_size
+from elara.schema_validator import ValidationLevel
+
+if TYPE_CHECKING:
+    from rich.console import Console
+    from rich.progress import Progress
+
+    from elara.batch import ConversionResult
+    from elara.converter import Converter
+    from elara.manifest import Manifest
+    from elara.variants import Variant, VariantConverter
 
 SHORT_HELP_TEXT = (
     """elara is a CLI tool to convert Jupyter notebooks into *pretty* HTML documents."""
@@ -30,18 +44,20 @@ def list_themes():
     """
     Lists all built-in themes.
     """
+    from pygments.styles import get_all_styles
+
     print(list(get_all_styles()))
 
 
-def get_output_filename(file: str):
+def get_output_filename(file: str, reserved: Container[str] = ()):
     """
-    Returns a non-existent HTML output file name.
+    Returns a non-existent HTML output file name, which is also not in `reserved`.
     """
     filename_wo_ext = "".join(file.split(".ipynb")[:-1])
     output_filename = filename_wo_ext + ".html"
     output_path = Path(output_filename)
     count = 1
-    while output_path.exists():
+    while output_path.exists() or output_filename in reserved:
         output_filename = f"{filename_wo_ext}({count}).html"
         count += 1
         output_path = Path(output_filename)
@@ -49,29 +65,285 @@ def get_output_filename(file: str):
     return output_filename
 
 
-def handle_file_conversion(input_file: str, output_filepath: str, converter: Converter):
+def resolve_cache_dir(cache: bool, cache_dir: Optional[Path]) -> Optional[str]:
+    """
+    Returns the cache directory to use, or `None` if caching is turned off.
+    """
+    if not cache:
+        return None
+    return str(cache_dir or default_cache_dir())
+
+
+def build_converter(
+    variants: "list[Variant]", **options
+) -> "Converter | VariantConverter":
+    """
+    Builds a converter, or a variant converter when there are several variants.
+    Exits with an error message if a theme doesn't exist.
+    """
+    from elara.converter import Converter
+    from elara.errors import ThemeNotFoundError
+    from elara.variants import VariantConverter, variant_labels
+
+    if len(variants) > 1:
+        try:
+            variant_labels(variants)
+        except ValueError as e:
+            raise typer.BadParameter(str(e))
+    try:
+        if len(variants) > 1:
+            return VariantConverter(variants, **options)
+        (variant,) = variants
+        return Converter(variant.theme_path, variant.font, variant.code_font, **options)
+    except ThemeNotFoundError as e:
+        print(f"[red]{e.message}[/]")
+        raise typer.Exit(1)
+
+
+def plan_variants(
+    themes: list[str], fonts: list[str], code_fonts: list[str]
+) -> "list[Variant]":
+    """
+    Every theme with every font set. Fonts and code fonts are paired up in the
+    order they're given, a single one goes with all of the others.
+    """
+    from itertools import product
+
+    from elara.variants import Variant
+
+    if len(fonts) == 1:
+        fonts = fonts * len(code_fonts)
+    if len(code_fonts) == 1:
+        code_fonts = code_fonts * len(fonts)
+    if len(fonts) != len(code_fonts):
+        raise typer.BadParameter(
+            "--font and --code-font must be given the same number of times, or once"
+        )
+    return [
+        Variant(theme, font, code_font)
+        for theme, (font, code_font) in product(themes, zip(fonts, code_fonts))
+    ]
+
+
+def report_failures(results: "list[ConversionResult]", console: "Console"):
+    """
+    Prints a summary of all the notebooks which failed to convert.
+    """
+    failures = [r for r in results if not r.ok]
+    if not failures:
+        return
+
+    console.print(
+        f"[red bold]{len(failures)} of {len(results)} notebooks failed to convert:[/]"
+    )
+    for result in failures:
+        console.print(f"  [cyan]{result.input_file}[/]: {result.error}")
+
+    raise typer.Exit(1)
+
+
+def print_timings(results: "list[ConversionResult]", console: "Console"):
+    """
+    Prints the per-stage timings of every converted notebook.
+    """
+    for result in results:
+        if result.timings is None:
+            continue
+        t = result.timings
+        stages = ", ".join(
+            f"{stage} {seconds * 1000:.1f}ms" for stage, seconds in t["stages"].items()
+        )
+        cached = " (cached)" if t["cache_hit"] else ""
+        console.print(f"[cyan]{result.input_file}[/]{cached}: {stages}")
+
+        highlights = t["highlight_per_cell"]
+        if highlights:
+            cache_hits = t["counters"].get("highlight_cache_hit", 0)
+            console.print(
+                f"  highlighted {len(highlights)} cells, slowest "
+                f"{max(highlights) * 1000:.1f}ms, mean "
+                f"{sum(highlights) / len(highlights) * 1000:.1f}ms, "
+                f"{cache_hits / len(highlights):.0%} from the cache"
+            )
+        console.print(f"  {t['bytes_in']:,} bytes in, {t['bytes_out']:,} bytes out")
+
+
+def print_resources(results: "list[ConversionResult]", console: "Console"):
     """
-    Actually converts the given notebook file using the passed converter object.
+    Prints the size, time and peak memory of every notebook, largest first.
     """
-    output = converter.convert(input_file)
-    if output is not None:
-        with open(output_filepath, "w") as f:
-            f.write(output)
+    from elara.scheduler import format_size
+
+    measured = [r for r in results if r.resources is not None]
+    measured.sort(key=lambda r: r.resources.size, reverse=True)
+    for result in measured:
+        usage = result.resources
+        peak = ""
+        if usage.peak_memory is not None:
+            peak = f", peak {format_size(usage.peak_memory)}"
+        low_memory = " (low memory)" if usage.low_memory else ""
+        console.print(
+            f"[cyan]{result.input_file}[/]{low_memory}: {format_size(usage.size)}, "
+            f"{usage.wall_time:.2f}s wall, {usage.cpu_time:.2f}s cpu{peak}"
+        )
 
 
 @app.command()
 def convert(
-    files: list[str],
-    theme: Annotated[str, typer.Option(help="The theme for code blocks.")] = "vs",
+    files: Annotated[
+        list[str],
+        typer.Argument(
+            help="Notebooks, directories to search for notebooks, or glob patterns."
+        ),
+    ],
+    out_dir: Annotated[
+        Optional[Path],
+        typer.Option(
+            help="Export into this directory, mirroring the layout of the inputs. "
+            "Notebooks which haven't changed since the last export are skipped, and "
+            "outputs of deleted notebooks are removed.",
+            file_okay=False,
+        ),
+    ] = None,
+    force: Annotated[
+        bool,
+        typer.Option(help="With --out-dir, export even the up-to-date notebooks."),
+    ] = False,
+    theme: Annotated[
+        list[str],
+        typer.Option(
+            help="The theme for code blocks. Can be repeated to export every notebook "
+            "in several themes at once, which only reads and renders it once. The "
+            "first theme is written to `name.html`, the others to `name.<theme>.html`."
+        ),
+    ] = ["vs"],
     font: Annotated[
-        str, typer.Option(help="Font for overall document.")
-    ] = "sans-serif",
+        list[str],
+        typer.Option(help="Font for overall document. Can be repeated, like --theme."),
+    ] = ["sans-serif"],
     code_font: Annotated[
-        str, typer.Option(help="Font for code and output.")
-    ] = "monospace",
+        list[str],
+        typer.Option(
+            help="Font for code and output. Can be repeated, like --theme, fonts are "
+            "paired up with the code fonts in order."
+        ),
+    ] = ["monospace"],
     silent: Annotated[
         bool, typer.Option(help="Silent output, print only the exported file names.")
     ] = False,
+    jobs: Annotated[
+        Optional[int],
+        typer.Option(
+            help="Number of notebooks to convert in parallel. Defaults to the CPU count.",
+            min=1,
+        ),
+    ] = None,
+    cache: Annotated[
+        bool, typer.Option(help="Reuse the output of previous conversions.")
+    ] = True,
+    cache_dir: Annotated[
+        Optional[Path],
+        typer.Option(
+            help="Directory for the conversion cache. Defaults to ~/.cache/elara.",
+            file_okay=False,
+        ),
+    ] = None,
+    validation: Annotated[
+        ValidationLevel,
+        typer.Option(
+            help="How thoroughly to validate notebooks. `structural` only checks the "
+            "notebook layout, `none` skips schema validation altogether."
+        ),
+    ] = ValidationLevel.full,
+    assets_dir: Annotated[
+        Optional[Path],
+        typer.Option(
+            help="Write embedded images into this directory, and link to them instead "
+            "of inlining them. Identical images are only written once.",
+            file_okay=False,
+        ),
+    ] = None,
+    low_memory: Annotated[
+        bool,
+        typer.Option(
+            help="Read notebooks one cell at a time, for notebooks too big to fit in memory."
+        ),
+    ] = False,
+    max_memory: Annotated[
+        Optional[int],
+        typer.Option(
+            help="Memory budget of the conversions running at once, like 512M or 4G, "
+            "as estimated from the size of the notebooks. Notebooks which don't fit "
+            "in it on their own are read one cell at a time, like with --low-memory.",
+            parser=parse_size,
+            metavar="SIZE",
+        ),
+    ] = None,
+    minify: Annotated[
+        bool, typer.Option(help="Strip the whitespace and comments of the markup.")
+    ] = False,
+    shared_css: Annotated[
+        Optional[Path],
+        typer.Option(
+            help="Write the styles, syntax highlighting included, to this file and "
+            "link to it instead of inlining them in every output.",
+            dir_okay=False,
+        ),
+    ] = None,
+    compress: Annotated[
+        Optional[list[Compression]],
+        typer.Option(
+            help="Also write a compressed copy of every output, can be repeated. "
+            "brotli needs the brotli package."
+        ),
+    ] = None,
+    max_output_lines: Annotated[
+        Optional[int],
+        typer.Option(
+            help="Truncate text outputs (streams, tracebacks, plain text) longer than "
+            "this, keeping their first and last lines. With --assets-dir, the full "
+            "text is linked from the truncated output.",
+            min=1,
+        ),
+    ] = None,
+    max_output_bytes: Annotated[
+        Optional[int],
+        typer.Option(help="Truncate text outputs bigger than this.", min=1),
+    ] = None,
+    cells_per_page: Annotated[
+        Optional[int],
+        typer.Option(
+            help="Split every output into pages of this many cells, written into a "
+            "`<name>_pages` directory. The output itself becomes an index page with a "
+            "table of contents built from the markdown headings.",
+            min=1,
+        ),
+    ] = None,
+    timings: Annotated[
+        bool,
+        typer.Option(
+            help="Print how long each stage of the conversion took, for every notebook."
+        ),
+    ] = False,
+    timings_json: Annotated[
+        Optional[Path],
+        typer.Option(help="Write the timings of every notebook to this JSON file."),
+    ] = None,
+    resources: Annotated[
+        bool,
+        typer.Option(
+            help="Print the size, wall and CPU time and peak memory of every notebook "
+            "once they're all converted."
+        ),
+    ] = False,
+    profile: Annotated[
+        Optional[Path],
+        typer.Option(
+            help="Profile the conversion with cProfile and dump the stats to this file. "
+            "Notebooks are converted one at a time while profiling.",
+            dir_okay=False,
+        ),
+    ] = None,
 ):
     """
     Converts multiple jupyter notebooks into HTML documents. Any options passed, will be applied to all
@@ -79,27 +351,426 @@ def convert(
 
     Font options can be prefixed with `gf:` to use Google Fonts directly.
     """
+    from rich.console import Console
+    from rich.progress import BarColumn, Progress, SpinnerColumn, TextColumn
+
+    from elara.batch import convert_batch
+
     spinner = SpinnerColumn("moon")
     text_col = TextColumn("[yellow]Converting[/]")
     bar_col = BarColumn(None)
     progress = Progress(spinner, text_col, bar_col)
-    converter = Converter(theme, font, code_font)
-    if silent:
-        # only prints the output filenames
-        # used by the vscode extension
-        for file in files:
-            output_filename = get_output_filename(file)
-            handle_file_conversion(file, output_filename, converter)
-            print(output_filename)
+    output_limits = None
+    if max_output_lines is not None or max_output_bytes is not None:
+        from elara.truncation import OutputLimits
+
+        output_limits = OutputLimits(max_output_lines, max_output_bytes)
+    converter = build_converter(
+        plan_variants(theme, font, code_font),
+        cache_dir=resolve_cache_dir(cache, cache_dir),
+        validation=validation,
+        assets_dir=str(assets_dir) if assets_dir is not None else None,
+        low_memory=low_memory,
+        minify=minify,
+        stylesheet=str(shared_css) if shared_css is not None else None,
+        output_limits=output_limits,
+        cells_per_page=cells_per_page,
+    )
+    compress = compress or []
+    if compress:
+        from elara.compress import check_available
+
+        try:
+            check_available(compress)
+        except ImportError as e:
+            print(f"[red]{e}[/]")
+            raise typer.Exit(1)
+
+    from elara.fileutils import expand_notebooks
+
+    notebooks = list(expand_notebooks(files))
+    manifest = None
+    manifest_entries = {}
+    skipped = 0
+    removed = []
+    if out_dir is None:
+        conversion_jobs = []
+        reserved = set()
+        for notebook, _ in notebooks:
+            file = str(notebook)
+            output_filename = get_output_filename(file, reserved)
+            reserved.add(output_filename)
+            conversion_jobs.append((file, output_filename))
     else:
-        # default look for CLI users
-        with progress:
-            for file in progress.track(files):
-                output_filename = get_output_filename(file)
+        from elara.manifest import Manifest
+
+        # outputs are outdated when they're missing a compressed copy too
+        options_key = make_key(converter.options_key, *sorted(compress))
+        manifest = Manifest.load(out_dir, options_key)
+        removed = manifest.remove_orphans()
+        conversion_jobs, manifest_entries, skipped = plan_out_dir_jobs(
+            notebooks, out_dir, manifest, force, converter
+        )
+
+    n_jobs = jobs or os.cpu_count() or 1
+    profiler = None
+    if profile is not None:
+        import cProfile
+
+        # worker processes wouldn't show up in the profile
+        n_jobs = 1
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    collect_timings = timings or timings_json is not None
+    results = []
+    batch = convert_batch(
+        converter, conversion_jobs, n_jobs, collect_timings, compress, max_memory
+    )
+    try:
+        if silent:
+            convert_silently(batch, results)
+        else:
+            convert_with_progress(batch, results, progress, len(conversion_jobs))
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile)
+
+    console = Console(stderr=True) if silent else progress.console
+    if shared_css is not None and compress:
+        from elara.compress import compress_file
+
+        for stylesheet in converter.outputs(str(shared_css)):
+            compress_file(stylesheet, compress)
+    if manifest is not None:
+        for result in results:
+            if result.ok and result.output_file in manifest_entries:
+                manifest.record(*manifest_entries[result.output_file])
+        manifest.save()
+        if not silent and (skipped or removed):
+            console.print(
+                f"Skipped {skipped} up-to-date notebooks, removed {len(removed)} "
+                "outputs of deleted notebooks."
+            )
+    if timings:
+        print_timings(results, console)
+    if resources:
+        print_resources(results, console)
+    if timings_json is not None:
+        timings_json.write_text(
+            json.dumps([r.timings for r in results if r.timings is not None], indent=2)
+        )
+    report_failures(results, console)
+
+
+def plan_out_dir_jobs(
+    notebooks: "list[tuple[Path, Path]]",
+    out_dir: Path,
+    manifest: "Manifest",
+    force: bool,
+    converter: "Converter | VariantConverter",
+):
+    """
+    Maps the notebooks into `out_dir`, mirroring their layout, and leaves out the
+    up-to-date ones unless `force` is set. Returns the jobs, the manifest entries
+    to record for their outputs, and the number of notebooks skipped.
+    """
+    jobs = []
+    entries = {}
+    skipped = 0
+    sources: dict[Path, Path] = {}
+    for notebook, relpath in notebooks:
+        output = relpath.with_suffix(".html")
+        source = sources.get(output)
+        if source is not None:
+            if source != notebook:
+                raise typer.BadParameter(
+                    f"{source} and {notebook} would both be exported to "
+                    f"{out_dir / output}"
+                )
+            # the same notebook matched by multiple inputs
+            continue
+        sources[output] = notebook
+
+        if not force and manifest.is_up_to_date(output, notebook):
+            skipped += 1
+            continue
+
+        output_file = str(out_dir / output)
+        if notebook.exists():
+            outputs = [Path(path) for path in converter.outputs(str(output))]
+            entries[output_file] = (output, manifest.entry_for(notebook, outputs))
+        (out_dir / output).parent.mkdir(parents=True, exist_ok=True)
+        jobs.append((str(notebook), output_file))
+
+    return jobs, entries, skipped
+
+
+def convert_silently(batch: "Iterable[ConversionResult]", results: list):
+    # only prints the output filenames
+    # used by the vscode extension
+    for result in batch:
+        results.append(result)
+        if result.ok:
+            print(result.output_file)
+            for variant_file in result.variant_files:
+                print(variant_file)
+
+
+def convert_with_progress(
+    batch: "Iterable[ConversionResult]",
+    results: list,
+    progress: "Progress",
+    total: int,
+):
+    # default look for CLI users
+    with progress:
+        task = progress.add_task("convert", total=total)
+        for result in batch:
+            results.append(result)
+            if result.ok:
+                outputs = ", ".join((result.output_file, *result.variant_files))
                 progress.print(
-                    f"Exporting [cyan]{file}[/] to [green bold]{output_filename}[/]..."
+                    f"Exported [cyan]{result.input_file}[/] to [green bold]{outputs}[/]"
+                )
+            else:
+                progress.print(f"[red]Failed to export [cyan]{result.input_file}[/][/]")
+            progress.advance(task)
+
+
+@app.command()
+def build_site(
+    sources: Annotated[
+        list[str],
+        typer.Argument(
+            help="Notebooks, directories to search for notebooks, or glob patterns."
+        ),
+    ],
+    out_dir: Annotated[
+        Path,
+        typer.Option(help="Directory to build the site in.", file_okay=False),
+    ] = Path("site"),
+    title: Annotated[str, typer.Option(help="Title of the index page.")] = "Notebooks",
+    theme: Annotated[str, typer.Option(help="The theme for code blocks.")] = "vs",
+    font: Annotated[
+        str, typer.Option(help="Font for overall document.")
+    ] = "sans-serif",
+    code_font: Annotated[
+        str, typer.Option(help="Font for code and output.")
+    ] = "monospace",
+    force: Annotated[
+        bool, typer.Option(help="Export even the up-to-date notebooks.")
+    ] = False,
+    silent: Annotated[
+        bool, typer.Option(help="Silent output, print only the exported file names.")
+    ] = False,
+    jobs: Annotated[
+        Optional[int],
+        typer.Option(
+            help="Number of notebooks to convert in parallel. Defaults to the CPU count.",
+            min=1,
+        ),
+    ] = None,
+    cache: Annotated[
+        bool, typer.Option(help="Reuse the output of previous conversions.")
+    ] = True,
+    cache_dir: Annotated[
+        Optional[Path],
+        typer.Option(
+            help="Directory for the conversion cache. Defaults to ~/.cache/elara.",
+            file_okay=False,
+        ),
+    ] = None,
+    validation: Annotated[
+        ValidationLevel, typer.Option(help="How thoroughly to validate notebooks.")
+    ] = ValidationLevel.full,
+    minify: Annotated[
+        bool, typer.Option(help="Strip the whitespace and comments of the markup.")
+    ] = False,
+    compress: Annotated[
+        Optional[list[Compression]],
+        typer.Option(
+            help="Also write a compressed copy of every page, can be repeated."
+        ),
+    ] = None,
+    cells_per_page: Annotated[
+        Optional[int],
+        typer.Option(help="Split every notebook into pages of this many cells.", min=1),
+    ] = None,
+):
+    """
+    Builds a static site out of notebooks: a page for every notebook, mirroring
+    the layout of the sources, and an index page listing them by title. All the
+    pages share a single stylesheet and assets directory, so that browsers only
+    fetch them once. Only the notebooks which changed are exported again.
+    """
+    from elara.fileutils import expand_notebooks
+    from elara.site import ASSETS_DIR, INDEX_NAME, STYLESHEET, write_site_index
+    from elara.variants import Variant
+
+    for notebook, relpath in expand_notebooks(sources):
+        if relpath.with_suffix(".html") == Path(INDEX_NAME):
+            raise typer.BadParameter(
+                f"{notebook} would be exported to {INDEX_NAME}, which is the site index"
+            )
+
+    try:
+        convert(
+            sources,
+            out_dir=out_dir,
+            force=force,
+            theme=[theme],
+            font=[font],
+            code_font=[code_font],
+            silent=silent,
+            jobs=jobs,
+            cache=cache,
+            cache_dir=cache_dir,
+            validation=validation,
+            assets_dir=out_dir / ASSETS_DIR,
+            minify=minify,
+            shared_css=out_dir / STYLESHEET,
+            compress=compress,
+            cells_per_page=cells_per_page,
+        )
+    finally:
+        # also listing the notebooks which did convert when some failed
+        converter = build_converter(
+            [Variant(theme, font, code_font)], validation=validation, minify=minify
+        )
+        index = write_site_index(converter, out_dir, title, compress or [])
+        if silent:
+            print(index)
+        else:
+            print(f"Wrote the index to [green bold]{index}[/]")
+
+
+@app.command()
+def watch(
+    paths: list[Path],
+    theme: Annotated[str, typer.Option(help="The theme for code blocks.")] = "vs",
+    font: Annotated[
+        str, typer.Option(help="Font for overall document.")
+    ] = "sans-serif",
+    code_font: Annotated[
+        str, typer.Option(help="Font for code and output.")
+    ] = "monospace",
+    interval: Annotated[
+        float, typer.Option(help="Seconds between checks for changes.", min=0.05)
+    ] = 0.5,
+    debounce: Annotated[
+        float,
+        typer.Option(
+            help="Seconds a notebook must stay unchanged before it's re-exported.",
+            min=0,
+        ),
+    ] = 0.3,
+    cache: Annotated[
+        bool, typer.Option(help="Reuse the output of previous conversions.")
+    ] = True,
+    cache_dir: Annotated[
+        Optional[Path],
+        typer.Option(
+            help="Directory for the conversion cache. Defaults to ~/.cache/elara.",
+            file_okay=False,
+        ),
+    ] = None,
+    validation: Annotated[
+        ValidationLevel,
+        typer.Option(help="How thoroughly to validate notebooks."),
+    ] = ValidationLevel.full,
+):
+    """
+    Watches notebooks, or directories of notebooks, and re-exports them whenever
+    they change. Each notebook is exported to an HTML file of the same name, which
+    is overwritten on every change.
+    """
+    from elara.batch import convert_file
+    from elara.variants import Variant
+    from elara.watcher import NotebookWatcher, stable_output_path
+
+    converter = build_converter(
+        [Variant(theme, font, code_font)],
+        cache_dir=resolve_cache_dir(cache, cache_dir),
+        validation=validation,
+    )
+    watcher = NotebookWatcher(paths, interval, debounce)
+
+    def export(notebooks: list[Path]):
+        for notebook in notebooks:
+            result = convert_file(
+                converter, str(notebook), str(stable_output_path(notebook))
+            )
+            if result.ok:
+                print(
+                    f"Exported [cyan]{result.input_file}[/] to "
+                    f"[green bold]{result.output_file}[/]"
+                )
+            else:
+                print(
+                    f"[red]Failed to export [cyan]{result.input_file}[/][/]: "
+                    f"{result.error}"
                 )
-                handle_file_conversion(file, output_filename, converter)
+
+    # catch up on the notebooks changed since they were last exported
+    export(watcher.outdated())
+    print("[yellow]Watching for changes, press Ctrl+C to stop.[/]")
+    try:
+        for notebooks in watcher.changes():
+            export(notebooks)
+    except KeyboardInterrupt:
+        pass
+
+
+@app.command()
+def serve(
+    socket: Annotated[
+        Optional[Path],
+        typer.Option(
+            help="Listen on this unix socket, instead of reading requests from stdin.",
+            dir_okay=False,
+        ),
+    ] = None,
+    workers: Annotated[
+        Optional[int],
+        typer.Option(
+            help="Number of requests handled at once. Defaults to the CPU count.",
+            min=1,
+        ),
+    ] = None,
+    cache: Annotated[
+        bool, typer.Option(help="Reuse the output of previous conversions.")
+    ] = True,
+    cache_dir: Annotated[
+        Optional[Path],
+        typer.Option(
+            help="Directory for the conversion cache. Defaults to ~/.cache/elara.",
+            file_okay=False,
+        ),
+    ] = None,
+    validation: Annotated[
+        ValidationLevel,
+        typer.Option(help="How thoroughly to validate notebooks."),
+    ] = ValidationLevel.full,
+):
+    """
+    Runs a conversion server for editor integrations, which keeps converters warm
+    between requests.
+
+    Requests are line delimited JSON-RPC 2.0 messages, the convert method takes
+    the file, output, theme, font and code_font params.
+    """
+    from elara.server import ConverterPool, Server
+
+    pool = ConverterPool(
+        cache_dir=resolve_cache_dir(cache, cache_dir), validation=validation
+    )
+    server = Server(pool, workers or os.cpu_count() or 1)
+    if socket is None:
+        server.serve_stdio()
+    else:
+        server.serve_socket(socket)
 
 
 if __name__ == "__main__":
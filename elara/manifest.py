@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import shutil
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Sequence
+
+from elara.compress import Compression
+from elara.fileutils import pages_dir, write_atomic
+
+MANIFEST_NAME = ".elara-manifest.json"
+MANIFEST_VERSION = 2
+
+
+@dataclass(frozen=True, slots=True)
+class ManifestEntry:
+    """
+    The state of the source notebook an output was exported from.
+    """
+
+    source: str
+    mtime_ns: int
+    size: int
+    sha256: str
+    # the conversion options the output was exported with
+    options_key: str
+    # every file exported from the source, relative to the output directory: the
+    # output itself, followed by the other theme and font variants
+    outputs: tuple[str, ...] = ()
+
+    @classmethod
+    def of(
+        cls, source: Path, options_key: str, outputs: Sequence[Path] = ()
+    ) -> "ManifestEntry":
+        stat = source.stat()
+        h = hashlib.sha256()
+        with open(source, "rb") as f:
+            while chunk := f.read(1024 * 1024):
+                h.update(chunk)
+        return cls(
+            str(source.absolute()),
+            stat.st_mtime_ns,
+            stat.st_size,
+            h.hexdigest(),
+            options_key,
+            tuple(output.as_posix() for output in outputs),
+        )
+
+    def output_paths(self, output: str) -> tuple[str, ...]:
+        """
+        The outputs of the entry recorded for `output`.
+        """
+        return self.outputs or (output,)
+
+
+class Manifest:
+    """
+    Tracks which source every output in `out_dir` was exported from, so that
+    up-to-date notebooks can be skipped and outputs of deleted notebooks removed.
+
+    `options_key` covers the conversion options, all the outputs are considered
+    outdated when it changes.
+    """
+
+    def __init__(self, out_dir: Path, options_key: str):
+        self.out_dir = out_dir
+        self.options_key = options_key
+        self.path = out_dir / MANIFEST_NAME
+        # output path relative to `out_dir`, in posix form -> entry
+        self.entries: dict[str, ManifestEntry] = {}
+
+    @classmethod
+    def load(cls, out_dir: Path, options_key: str) -> "Manifest":
+        manifest = cls(out_dir, options_key)
+        try:
+            data = json.loads(manifest.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return manifest
+        except json.JSONDecodeError:
+            # a corrupt manifest only costs a full export
+            return manifest
+
+        if data.get("version") != MANIFEST_VERSION:
+            return manifest
+        try:
+            manifest.entries = {
+                output: ManifestEntry(**{**entry, "outputs": tuple(entry["outputs"])})
+                for output, entry in data["entries"].items()
+            }
+        except (KeyError, TypeError):
+            pass
+        return manifest
+
+    def is_up_to_date(self, output: Path, source: Path) -> bool:
+        """
+        Whether `output`, and all the variants exported along with it, were
+        exported from the current contents of `source`. Only stats the source,
+        unless its mtime changed but not its size, in which case the contents are
+        hashed.
+        """
+        entry = self.entries.get(output.as_posix())
+        if (
+            entry is None
+            or entry.options_key != self.options_key
+            or entry.source != str(source.absolute())
+        ):
+            return False
+        for path in entry.output_paths(output.as_posix()):
+            if not (self.out_dir / path).exists():
+                return False
+
+        try:
+            stat = source.stat()
+        except FileNotFoundError:
+            return False
+        if stat.st_size != entry.size:
+            return False
+        if stat.st_mtime_ns == entry.mtime_ns:
+            return True
+
+        # touched, or saved without changes
+        current = self.entry_for(source, [Path(path) for path in entry.outputs])
+        if current.sha256 != entry.sha256:
+            return False
+        self.entries[output.as_posix()] = current
+        return True
+
+    def entry_for(self, source: Path, outputs: Sequence[Path] = ()) -> ManifestEntry:
+        return ManifestEntry.of(source, self.options_key, outputs)
+
+    def record(self, output: Path, entry: ManifestEntry):
+        self.entries[output.as_posix()] = entry
+
+    def remove_orphans(self) -> list[Path]:
+        """
+        Deletes the outputs whose source notebooks no longer exist, along with
+        their variants, compressed copies and pages. Returns their paths.
+        """
+        removed = []
+        for output, entry in list(self.entries.items()):
+            if os.path.exists(entry.source):
+                continue
+            for output_path in entry.output_paths(output):
+                path = self.out_dir / output_path
+                path.unlink(missing_ok=True)
+                for compression in Compression:
+                    compressed = path.with_name(path.name + compression.suffix)
+                    compressed.unlink(missing_ok=True)
+                shutil.rmtree(pages_dir(path), ignore_errors=True)
+                removed.append(path)
+            del self.entries[output]
+        return removed
+
+    def save(self):
+        data = {
+            "version": MANIFEST_VERSION,
+            "entries": {
+                output: asdict(entry) for output, entry in sorted(self.entries.items())
+            },
+        }
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        write_atomic(self.path, json.dumps(data, indent=2).encode("utf-8"))
@@ -0,0 +1,44 @@
+import re
+
+from jinja2 import Environment, FileSystemLoader
+
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+# whitespace around these never matters. ":" only loses the whitespace after it,
+# `a :hover` and `a:hover` are different selectors
+_CSS_PUNCTUATION = re.compile(r"\s*([{};,>])\s*|:\s+")
+_WHITESPACE = re.compile(r"\s+")
+_STYLE_BLOCK = re.compile(r"(<style>)(.*?)(</style>)", re.DOTALL)
+
+
+def minify_css(css: str) -> str:
+    """
+    Removes comments and insignificant whitespace from a stylesheet.
+    """
+    css = _CSS_COMMENT.sub("", css)
+    css = _WHITESPACE.sub(" ", css)
+    css = _CSS_PUNCTUATION.sub(lambda m: m[1] or ":", css)
+    return css.replace(";}", "}").strip()
+
+
+def minify_template(source: str) -> str:
+    """
+    Minifies the markup of a template: indentation, blank lines and the inline
+    stylesheet. Only the template itself is touched, whatever its expressions
+    render into (code, outputs, markdown) is left as is.
+    """
+    source = _STYLE_BLOCK.sub(lambda m: m[1] + minify_css(m[2]) + m[3], source)
+    lines = (line.strip() for line in source.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class MinifyingLoader(FileSystemLoader):
+    """
+    Loads templates minified, so that the whitespace is removed once at compile
+    time instead of from every document.
+    """
+
+    def get_source(self, environment: Environment, template: str):
+        source, filename, uptodate = super().get_source(environment, template)
+        if template.endswith(".css"):
+            return minify_css(source), filename, uptodate
+        return minify_template(source), filename, uptodate
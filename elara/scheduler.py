@@ -0,0 +1,186 @@
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Iterable
+
+# peak memory of converting a notebook, per byte of it. measured on the benchmark
+# notebooks, it's about 2x for notebooks full of images and up to 6x for ones
+# with many small outputs, whose models take more room than their JSON
+MEMORY_PER_BYTE = 6
+# low memory conversions only hold a few cells at a time, whatever the size of
+# the notebook
+LOW_MEMORY_ESTIMATE = 64 * 1024 * 1024
+
+_SIZE = re.compile(r"\s*(\d+(?:\.\d+)?)\s*([kmgt]?)i?b?\s*", re.IGNORECASE)
+_SIZE_UNITS = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3, "t": 1024**4}
+
+
+def parse_size(value: str) -> int:
+    """
+    Parses a size in bytes, like `1500000`, `512M`, `4GB` or `1.5GiB`.
+    """
+    match = _SIZE.fullmatch(value)
+    if match is None:
+        raise ValueError(f"Invalid size {value!r}, expected something like 512M or 4G")
+    number, unit = match.groups()
+    return int(float(number) * _SIZE_UNITS[unit.lower()])
+
+
+def format_size(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            break
+        size /= 1024
+    return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+
+
+def estimate_memory(size: int, low_memory: bool) -> int:
+    """
+    Roughly how much memory converting a notebook of `size` bytes takes.
+    """
+    estimate = size * MEMORY_PER_BYTE
+    if low_memory:
+        return min(estimate, LOW_MEMORY_ESTIMATE)
+    return estimate
+
+
+@dataclass(frozen=True, slots=True)
+class ScheduledJob:
+    # position among the jobs, results are reported in this order
+    index: int
+    input_file: str
+    output_file: str
+    size: int
+    # converted cell by cell, see `Converter(low_memory=True)`
+    low_memory: bool
+    memory: int
+
+
+def plan_jobs(
+    jobs: Iterable[tuple[str, str]],
+    max_memory: int | None = None,
+    low_memory: bool = False,
+) -> list[ScheduledJob]:
+    """
+    Sizes up the (input, output) jobs. Notebooks which wouldn't fit in
+    `max_memory` are converted in low memory mode, as are all of them when
+    `low_memory` is set.
+    """
+    planned = []
+    for index, (input_file, output_file) in enumerate(jobs):
+        try:
+            size = os.path.getsize(input_file)
+        except OSError:
+            # the conversion fails and reports it
+            size = 0
+        low = low_memory or (
+            max_memory is not None and estimate_memory(size, False) > max_memory
+        )
+        memory = estimate_memory(size, low)
+        planned.append(ScheduledJob(index, input_file, output_file, size, low, memory))
+    return planned
+
+
+class Scheduler:
+    """
+    Hands out jobs largest first, so that the biggest notebooks don't start last
+    and hold up the end of the batch, while keeping the estimated memory of the
+    running jobs within `max_memory`.
+
+    When the largest job doesn't fit in what's left of the budget, a smaller one
+    which does is started instead, so that workers don't idle behind it.
+    """
+
+    def __init__(self, jobs: Iterable[ScheduledJob], max_memory: int | None = None):
+        self.pending = sorted(jobs, key=lambda job: job.size, reverse=True)
+        self.max_memory = max_memory
+        self.running = 0
+        self.in_flight = 0
+
+    def take(self) -> ScheduledJob | None:
+        """
+        The next job to start, or `None` when none fits until some finish.
+        Jobs bigger than the entire budget still run, alone.
+        """
+        if not self.pending:
+            return None
+        index = 0
+        if self.max_memory is not None and self.running:
+            available = self.max_memory - self.in_flight
+            index = next(
+                (i for i, job in enumerate(self.pending) if job.memory <= available),
+                None,
+            )
+            if index is None:
+                return None
+        job = self.pending.pop(index)
+        self.running += 1
+        self.in_flight += job.memory
+        return job
+
+    def finished(self, job: ScheduledJob):
+        self.running -= 1
+        self.in_flight -= job.memory
+
+
+@dataclass(frozen=True, slots=True)
+class ResourceUsage:
+    """
+    Resources used to convert a single notebook.
+    """
+
+    size: int
+    low_memory: bool
+    wall_time: float
+    cpu_time: float
+    # peak resident memory of the process converting it. only per notebook on
+    # linux, elsewhere it's the peak of the process so far. `None` on windows
+    peak_memory: int | None
+
+
+def _reset_peak_memory():
+    try:
+        # resets VmHWM, the peak resident set size
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _peak_memory() -> int | None:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes, except on macOS
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+class ResourceMeter:
+    """
+    Measures the resources used by the current thread from its creation on.
+    """
+
+    def __init__(self):
+        _reset_peak_memory()
+        self._wall = time.perf_counter()
+        # the conversion runs on a single thread, unlike compression
+        self._cpu = time.thread_time()
+
+    def stop(self, size: int, low_memory: bool) -> ResourceUsage:
+        return ResourceUsage(
+            size,
+            low_memory,
+            time.perf_counter() - self._wall,
+            time.thread_time() - self._cpu,
+            _peak_memory(),
+        )
@@ -1,10 +1,47 @@
-import importlib
+import importlib.resources
 import json
-from typing import Any
+from enum import Enum
+from functools import cache
+from typing import TYPE_CHECKING, Any
 
-from jsonschema import Draft4Validator, validate
+# jsonschema is imported when a validator is first needed, it's slow to import
+if TYPE_CHECKING:
+    from jsonschema import Draft4Validator
 
 
+class ValidationLevel(str, Enum):
+    """
+    How thoroughly notebooks are checked against the nbformat schema.
+    """
+
+    # the entire nbformat v4 schema, the models are then built without validation
+    full = "full"
+    # only the top-level layout and the cell types, outputs are left to the models
+    structural = "structural"
+    # no schema validation, relies on the pydantic models in `elara.notebook`
+    none = "none"
+
+
+STRUCTURAL_SCHEMA = {
+    "type": "object",
+    "required": ["metadata", "nbformat_minor", "nbformat", "cells"],
+    "properties": {
+        "metadata": {"type": "object"},
+        "nbformat_minor": {"type": "integer", "minimum": 0},
+        "nbformat": {"type": "integer", "minimum": 4, "maximum": 4},
+        "cells": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["cell_type", "metadata", "source"],
+                "properties": {"cell_type": {"enum": ["raw", "markdown", "code"]}},
+            },
+        },
+    },
+}
+
+
+@cache
 def get_notebook_schema() -> dict[str, Any]:
     ref = importlib.resources.files("elara") / "schemas" / "v4.0.json"
     with importlib.resources.as_file(ref) as jsonschema_path:
@@ -12,11 +49,78 @@ def get_notebook_schema() -> dict[str, Any]:
             return json.load(f)
 
 
-notebook_schema = get_notebook_schema()
+@cache
+def get_validator(level: ValidationLevel) -> "Draft4Validator":
+    """
+    Returns a validator for the given level. The schema is checked and the
+    validator built only once, and then reused for every notebook.
+    """
+    if level == ValidationLevel.full:
+        schema = get_notebook_schema()
+    elif level == ValidationLevel.structural:
+        schema = STRUCTURAL_SCHEMA
+    else:
+        raise ValueError(f"no validator for {level=}")
+
+    from jsonschema import Draft4Validator
+
+    Draft4Validator.check_schema(schema)
+    return Draft4Validator(schema)
+
+
+@cache
+def get_cell_validator(level: ValidationLevel) -> "Draft4Validator":
+    """
+    Returns a validator for a single cell, used when notebooks are read cell by cell.
+    """
+    if level == ValidationLevel.full:
+        # draft 4 ignores everything next to $ref, the definitions are only referenced
+        schema = {
+            "definitions": get_notebook_schema()["definitions"],
+            "$ref": "#/definitions/cell",
+        }
+    elif level == ValidationLevel.structural:
+        schema = STRUCTURAL_SCHEMA["properties"]["cells"]["items"]
+    else:
+        raise ValueError(f"no validator for {level=}")
+
+    from jsonschema import Draft4Validator
+
+    Draft4Validator.check_schema(schema)
+    return Draft4Validator(schema)
+
+
+def _validate(validator: "Draft4Validator", instance: Any):
+    from jsonschema.exceptions import best_match
+
+    # same error selection as `jsonschema.validate`
+    error = best_match(validator.iter_errors(instance))
+    if error is not None:
+        raise error
+
+
+def validate_notebook(
+    notebook_json: dict[str, Any], level: ValidationLevel = ValidationLevel.full
+):
+    """
+    Validates the notebook, raises `jsonschema.ValidationError` if it's invalid.
+    """
+    if level == ValidationLevel.none:
+        return
+
+    _validate(get_validator(level), notebook_json)
+
 
+def validate_cell(
+    cell_json: dict[str, Any], level: ValidationLevel = ValidationLevel.full
+):
+    """
+    Validates a single cell, raises `jsonschema.ValidationError` if it's invalid.
+    """
+    if level == ValidationLevel.none:
+        return
 
-def validate_notebook(notebook_json: dict[str, Any]) -> bool:
-    validate(notebook_json, notebook_schema, cls=Draft4Validator)
+    _validate(get_cell_validator(level), cell_json)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,247 @@
+import io
+import json
+import socketserver
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import IO, Any, Iterable
+
+from elara.batch import describe_error
+from elara.converter import Converter
+from elara.errors import ThemeNotFoundError
+
+# converters kept warm at once, each one holds a compiled template and style
+MAX_CONVERTERS = 16
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+CONVERSION_ERROR = -32000
+
+
+class RPCError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class ConverterPool:
+    """
+    Keeps warm converters around, one per (theme, font, code_font).
+    """
+
+    def __init__(self, **options: Any):
+        # options shared by every converter, like the cache directory
+        self.options = options
+        self._converters: OrderedDict[tuple, Converter] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, theme: str, font: str, code_font: str) -> Converter:
+        key = (theme, font, code_font)
+        with self._lock:
+            converter = self._converters.get(key)
+            if converter is None:
+                try:
+                    converter = Converter(theme, font, code_font, **self.options)
+                except ThemeNotFoundError as e:
+                    raise RPCError(INVALID_PARAMS, e.message)
+                self._converters[key] = converter
+                if len(self._converters) > MAX_CONVERTERS:
+                    self._converters.popitem(last=False)
+            else:
+                self._converters.move_to_end(key)
+
+        return converter
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Highlight cache statistics, summed over the warm converters.
+        """
+        with self._lock:
+            converters = list(self._converters.values())
+        # renderers are built on the first render, those which only hit the render
+        # cache haven't highlighted anything
+        stats = [
+            c.renderer.highlight_stats for c in converters if "renderer" in vars(c)
+        ]
+        hits = sum(s.hits for s in stats)
+        disk_hits = sum(s.disk_hits for s in stats)
+        misses = sum(s.misses for s in stats)
+        total = hits + disk_hits + misses
+        return {
+            "converters": len(converters),
+            "highlight_cache": {
+                "hits": hits,
+                "disk_hits": disk_hits,
+                "misses": misses,
+                "hit_rate": (hits + disk_hits) / total if total else 0.0,
+            },
+        }
+
+
+class Server:
+    """
+    Serves conversion requests as line delimited JSON-RPC 2.0, every request and
+    every response is a single line of JSON. Requests are handled concurrently,
+    so responses may arrive out of order and must be matched by their `id`.
+
+    Methods:
+        convert(file, output=None, theme="vs", font="sans-serif", code_font="monospace")
+            Writes the HTML to `output` and returns {"output": output} if it's
+            given, returns {"html": ...} otherwise.
+        ping()
+            Returns "pong".
+        stats()
+            Returns the number of warm converters and highlight cache statistics.
+        shutdown()
+            Answered once all the earlier requests are done, then the server stops.
+    """
+
+    def __init__(self, pool: ConverterPool, workers: int):
+        self.pool = pool
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.stopped = threading.Event()
+
+    def convert(
+        self,
+        file: str,
+        output: str | None = None,
+        theme: str = "vs",
+        font: str = "sans-serif",
+        code_font: str = "monospace",
+    ) -> dict[str, str]:
+        converter = self.pool.get(theme, font, code_font)
+        try:
+            if output is not None:
+                converter.convert_to(file, output, strict=True)
+                return {"output": output}
+            return {"html": converter.convert(file, strict=True)}
+        except Exception as e:
+            raise RPCError(CONVERSION_ERROR, describe_error(e))
+
+    def handle(self, request: Any) -> dict[str, Any] | None:
+        """
+        Handles a single decoded request. Returns the response, or `None` for
+        notifications.
+        """
+        request_id = None
+        try:
+            if isinstance(request, json.JSONDecodeError):
+                raise RPCError(PARSE_ERROR, str(request))
+            if not isinstance(request, dict) or not isinstance(
+                request.get("method"), str
+            ):
+                raise RPCError(INVALID_REQUEST, "invalid request")
+
+            request_id = request.get("id")
+            method = request["method"]
+            params = request.get("params", {})
+            if not isinstance(params, dict):
+                raise RPCError(INVALID_PARAMS, "params must be an object")
+
+            if method == "convert":
+                try:
+                    result = self.convert(**params)
+                except TypeError as e:
+                    raise RPCError(INVALID_PARAMS, str(e))
+            elif method == "ping":
+                result = "pong"
+            elif method == "stats":
+                result = self.pool.stats()
+            elif method == "shutdown":
+                self.stopped.set()
+                result = None
+            else:
+                raise RPCError(METHOD_NOT_FOUND, f"unknown method {method!r}")
+
+            response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+        except RPCError as e:
+            response = {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "error": {"code": e.code, "message": e.message},
+            }
+
+        if request_id is None and "result" in response:
+            # a notification, nobody is waiting for the response
+            return None
+        return response
+
+    def serve_stream(self, rfile: Iterable[str], wfile: IO[str]):
+        """
+        Serves requests from a line oriented stream, until it ends or a shutdown
+        request comes in. Returns once all the pending requests have been answered.
+        """
+        write_lock = threading.Lock()
+        # only the requests still being handled, a long lived connection would
+        # otherwise hold on to every future it ever had
+        pending: set[Future] = set()
+        pending_lock = threading.Lock()
+
+        def done(future: Future):
+            with pending_lock:
+                pending.discard(future)
+
+        def wait_pending():
+            with pending_lock:
+                outstanding = list(pending)
+            for future in outstanding:
+                future.result()
+
+        def respond(request: Any):
+            response = self.handle(request)
+            if response is None:
+                return
+            with write_lock:
+                wfile.write(json.dumps(response) + "\n")
+                wfile.flush()
+
+        for line in rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                request = e
+
+            if isinstance(request, dict) and request.get("method") == "shutdown":
+                wait_pending()
+                respond(request)
+                return
+
+            future = self.executor.submit(respond, request)
+            with pending_lock:
+                pending.add(future)
+            # runs right away if it's already done
+            future.add_done_callback(done)
+
+        wait_pending()
+
+    def serve_stdio(self):
+        stdout = sys.stdout
+        # anything printed while converting would corrupt the protocol
+        with redirect_stdout(sys.stderr):
+            self.serve_stream(sys.stdin, stdout)
+
+    def serve_socket(self, path: Path):
+        server_ = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                rfile = io.TextIOWrapper(self.rfile, encoding="utf-8")
+                wfile = io.TextIOWrapper(self.wfile, encoding="utf-8")
+                server_.serve_stream(rfile, wfile)
+                if server_.stopped.is_set():
+                    threading.Thread(target=unix_server.shutdown).start()
+
+        path.unlink(missing_ok=True)
+        with socketserver.ThreadingUnixStreamServer(str(path), Handler) as unix_server:
+            try:
+                unix_server.serve_forever()
+            finally:
+                path.unlink(missing_ok=True)
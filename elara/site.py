@@ -0,0 +1,66 @@
+from pathlib import Path
+from typing import Sequence
+from urllib.parse import quote
+
+from elara.compress import Compression, compress_file
+from elara.converter import Converter
+from elara.fileutils import write_atomic
+from elara.lazy_notebook import read_cells
+from elara.manifest import Manifest
+from elara.template_renderer import SitePage, TemplateRenderer, get_source
+
+INDEX_NAME = "index.html"
+# relative to the site, shared by every page
+ASSETS_DIR = "assets"
+STYLESHEET = "assets/style.css"
+
+# cells searched for a heading to use as the title
+TITLE_CELLS = 10
+
+
+def notebook_title(path: Path, renderer: TemplateRenderer) -> str | None:
+    """
+    The first markdown heading of the notebook, found among its first cells.
+    """
+    try:
+        for i, cell in enumerate(read_cells(path)):
+            if i >= TITLE_CELLS:
+                break
+            if not isinstance(cell, dict) or cell.get("cell_type") != "markdown":
+                continue
+            for _, title in renderer.headings(get_source(cell.get("source", ""))):
+                if title.strip():
+                    return title.strip()
+    except (OSError, ValueError):
+        # unreadable notebooks are listed by their file name
+        pass
+    return None
+
+
+def write_site_index(
+    converter: Converter,
+    out_dir: Path,
+    title: str,
+    compress: Sequence[Compression] = (),
+) -> Path:
+    """
+    Writes the index of the site, listing every notebook exported into `out_dir`
+    by their title. The notebooks are taken from the manifest of `out_dir`.
+    """
+    # only the entries are needed, not the up-to-date checks
+    manifest = Manifest.load(out_dir, options_key="")
+    pages = []
+    for output, entry in sorted(manifest.entries.items()):
+        if not (out_dir / output).exists():
+            continue
+        page_title = notebook_title(Path(entry.source), converter.renderer)
+        pages.append(SitePage(page_title or Path(output).stem, quote(output), output))
+
+    html = converter.renderer.render_site_index(
+        title, pages, converter.font, converter.code_font, STYLESHEET
+    )
+    index = out_dir / INDEX_NAME
+    write_atomic(index, html.encode("utf-8"))
+    if compress:
+        compress_file(str(index), compress)
+    return index
@@ -2,33 +2,79 @@ import json
 import re
 from dataclasses import asdict, dataclass
 from datetime import date
-from functools import partial
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator
 from urllib.parse import quote_plus
 
-from ansi2html import Ansi2HTMLConverter
-from jinja2 import Environment, FileSystemLoader  # , select_autoescape
-from markdown_it import MarkdownIt
+from jinja2 import Environment, FileSystemLoader, pass_context  # , select_autoescape
+from jinja2.runtime import Context
 from pygments.styles import get_style_by_name
 
-from elara.highlighter import SyntaxHighlighter
-from elara.notebook import Notebook
+from elara.ansi import ansi_to_html
+from elara.assets import AssetStore
+from elara.cache import DiskCache, content_key, elara_version, make_key
+from elara.fast_notebook import FastCell, FastNotebook
+from elara.highlighter import HighlightStats, SyntaxHighlighter
+from elara.lazy_notebook import LazyNotebook
+from elara.lexers import DEFAULT_LANGUAGE, notebook_language
+from elara.minify import MinifyingLoader, minify_css
+from elara.notebook import Cell, Notebook
 from elara.themes import Theme
+from elara.timings import instrumented
+from elara.truncation import OutputLimits, TruncatedText, strip_ansi, truncate_text
+
+# characters grouped into a single chunk while streaming
+STREAM_BUFFER_SIZE = 64 * 1024
+# cells with more data than this, mostly ones with images, are not worth caching,
+# hashing and storing them costs about as much as rendering them
+FRAGMENT_CACHE_MAX_SIZE = 256 * 1024
 
 
 @dataclass(frozen=True, slots=True)
 class RenderOptions:
     filename: str
-    notebook: Notebook
+    notebook: Notebook | FastNotebook | LazyNotebook
     font: str
     code_font: str
     date_: date = date.today()
+    # URL of the assets directory relative to the output, images are inlined if not set
+    assets_url: str | None = None
+    # URL of the shared stylesheet, the styles are inlined if not set
+    stylesheet_url: str | None = None
 
     def as_dict(self):
         return asdict(self)
 
 
+@dataclass(frozen=True, slots=True)
+class Heading:
+    """
+    A markdown heading, an entry in the table of contents of a paginated document.
+    """
+
+    level: int
+    title: str
+    # the page the heading is on, and the id of its cell there
+    page: int
+    anchor: str
+
+
+@dataclass(frozen=True, slots=True)
+class SitePage:
+    """
+    A notebook in the index of a site.
+    """
+
+    title: str
+    url: str
+    # the output path, relative to the site
+    path: str
+
+
+def page_filename(number: int) -> str:
+    return f"page-{number}.html"
+
+
 def get_source(s: str | list[str] | dict[Any, Any]) -> str:
     """
     Jinja filter to render model `Source`.
@@ -75,11 +121,36 @@ def format_google_font(font_name: str) -> str:
     return quote_plus(font_name[3:])
 
 
+def _texts(output: Any) -> Iterator[Any]:
+    """
+    Yields the text sources of an output, the ones subject to the output limits.
+    """
+    if output.output_type == "stream":
+        yield output.text
+    elif output.output_type == "error":
+        yield output.traceback
+    elif output.output_type in ("display_data", "execute_result"):
+        if "text/plain" in output.data:
+            yield output.data["text/plain"]
+
+
 class TemplateRenderer:
-    def __init__(self, theme: Theme | str):
+    def __init__(
+        self,
+        theme: Theme | str,
+        fragment_cache: DiskCache | None = None,
+        asset_store: AssetStore | None = None,
+        highlight_cache: DiskCache | None = None,
+        css: str | None = None,
+        minify: bool = False,
+        output_limits: OutputLimits | None = None,
+    ):
         templates_path = Path(__file__).parent / "templates"
+        loader_class = MinifyingLoader if minify else FileSystemLoader
         self.__env = Environment(
-            loader=FileSystemLoader(str(templates_path)),
+            loader=loader_class(str(templates_path)),
+            # drops the newlines left behind by block tags
+            trim_blocks=minify,
             auto_reload=False,
             autoescape=False,
             # autoescape=select_autoescape(),
@@ -87,42 +158,318 @@ class TemplateRenderer:
         # configure custom filters and tests
         self.__env.filters["get_source"] = get_source
 
-        self._md_it = MarkdownIt()
-        self.__env.filters["md2html"] = self._md_it.render
-
-        self._ansi2html = Ansi2HTMLConverter(dark_bg=False)
-        self.__env.filters["ansi2html"] = partial(self._ansi2html.convert, full=False)
+        # created on first use, plenty of notebooks don't need it
+        self._md_it = None
+        self.__env.filters["md2html"] = instrumented("markdown", self._md2html)
+        self.__env.filters["ansi2html"] = instrumented("ansi2html", ansi_to_html)
 
         self.theme = theme
-        self._syntax_highlighter = SyntaxHighlighter(theme)
-        self.__env.filters["highlight"] = self._syntax_highlighter.highlight
+        self.fragment_cache = fragment_cache
+        self.asset_store = asset_store
+        if fragment_cache is not None:
+            theme_key = theme.model_dump_json() if isinstance(theme, Theme) else theme
+            self._fragment_key_prefix = make_key(
+                elara_version(), theme_key, str(minify), repr(output_limits)
+            )
+
+        self._syntax_highlighter = SyntaxHighlighter(theme, disk_cache=highlight_cache)
+        self.__env.filters["highlight"] = instrumented(
+            "highlight", self._syntax_highlighter.highlight
+        )
         if isinstance(self.theme, Theme):
             self.bg_color = self.theme.raw_colors.get("editor.background")
         elif isinstance(self.theme, str):
             self.bg_color = get_style_by_name(self.theme).background_color
 
-        self._css_styles = self._syntax_highlighter.formatter.get_style_defs(
-            ".highlight"
-        )
+        # precompiled stylesheets come from the theme cache
+        if css is None:
+            css = self._syntax_highlighter.formatter.get_style_defs(".highlight")
+        if minify:
+            css = minify_css(css)
+        self.css = css
 
         self.__env.tests["isjson"] = isjson
         self.__env.tests["isb64image"] = isb64image
+        self.__env.filters["image_src"] = self._image_src
+        self.output_limits = output_limits
+        self.__env.filters["limit_output"] = self._limit_output
+        self.__env.filters["full_output_url"] = self._full_output_url
 
         self.__env.tests["is_google_font"] = is_google_font
         self.__env.filters["format_google_font"] = format_google_font
 
         self.__template = self.__env.get_template("export.html")
+        self.__cell_template = self.__env.get_template("cell.html")
+        self.__page_template = self.__env.get_template("page.html")
+        self.__index_template = self.__env.get_template("index.html")
+        self.__stylesheet_template = self.__env.get_template("styles.css")
+        self.__site_template = self.__env.get_template("site.html")
+
+    @property
+    def highlight_stats(self) -> HighlightStats:
+        return self._syntax_highlighter.stats
+
+    def _markdown(self):
+        if self._md_it is None:
+            from markdown_it import MarkdownIt
+
+            self._md_it = MarkdownIt()
+        return self._md_it
+
+    def _md2html(self, text: str) -> str:
+        """
+        Jinja filter to render markdown.
+        """
+        return self._markdown().render(text)
+
+    def headings(self, text: str) -> Iterator[tuple[int, str]]:
+        """
+        Yields the level and the plain text title of every heading in markdown.
+        """
+        tokens = self._markdown().parse(text)
+        for token, inline in zip(tokens, tokens[1:]):
+            if token.type == "heading_open":
+                title = "".join(
+                    child.content
+                    for child in inline.children or ()
+                    if child.type in ("text", "code_inline")
+                )
+                yield int(token.tag[1:]), title
 
-    def render(self, options: RenderOptions):
+    @pass_context
+    def _image_src(self, ctx: Context, data: str, mimetype: str) -> str:
+        """
+        Jinja filter to get the `src` of an embedded image. The image is moved into
+        the asset store when there's one, and inlined as a data URI otherwise.
+        """
+        assets_url = ctx.get("assets_url")
+        if self.asset_store is None or assets_url is None:
+            return f"data:{mimetype};base64, {data}"
+
+        name = self.asset_store.add_base64(data, mimetype)
+        return f"{assets_url}/{name}"
+
+    def _limit_output(self, source: Any) -> TruncatedText:
+        """
+        Jinja filter to truncate a text output to the output limits.
+        """
+        if self.output_limits is None:
+            return TruncatedText(head=get_source(source), tail="")
+        return truncate_text(source, self.output_limits)
+
+    @pass_context
+    def _full_output_url(self, ctx: Context, text: TruncatedText) -> str | None:
+        """
+        Jinja filter to move the full text of a truncated output into the asset
+        store, returns its URL. `None` if there's no asset store.
+        """
+        assets_url = ctx.get("assets_url")
+        if self.asset_store is None or assets_url is None or text.full is None:
+            return None
+
+        name = self.asset_store.add(strip_ansi(text.full).encode("utf-8"), "txt")
+        return f"{assets_url}/{name}"
+
+    def _writes_assets(self, cell: Cell | FastCell, assets_url: str | None) -> bool:
+        if self.asset_store is None or assets_url is None or cell.cell_type != "code":
+            return False
+        for output in cell.outputs:
+            if output.output_type in ("display_data", "execute_result"):
+                if any(isb64image(mimetype) for mimetype in output.data):
+                    return True
+            if self.output_limits is not None and any(
+                self.output_limits.exceeded(text) for text in _texts(output)
+            ):
+                # the full text of a truncated output is an asset too
+                return True
+        return False
+
+    def render_cell(
+        self,
+        cell: Cell | FastCell,
+        assets_url: str | None = None,
+        language: str = DEFAULT_LANGUAGE,
+    ) -> str:
+        """
+        Renders a single cell into an HTML fragment, `language` is the one of the
+        notebook. Fragments are looked up in the fragment cache first, so only new
+        or changed cells are rendered. Big cells are always rendered.
+        """
+        cache_key = None
+        # a cached fragment can't bring back deleted assets, cells which
+        # write assets are always rendered
+        if self.fragment_cache is not None and not self._writes_assets(
+            cell, assets_url
+        ):
+            # id and metadata aren't rendered, changes to them shouldn't cause a miss
+            cell_key = content_key(
+                cell, exclude={"id", "metadata"}, max_size=FRAGMENT_CACHE_MAX_SIZE
+            )
+            if cell_key is not None:
+                cache_key = make_key(self._fragment_key_prefix, language, cell_key)
+                fragment = self.fragment_cache.get(cache_key)
+                if fragment is not None:
+                    return fragment
+
+        fragment = self.__cell_template.render(
+            cell=cell, assets_url=assets_url, language=language
+        )
+        if cache_key is not None:
+            self.fragment_cache.set(cache_key, fragment)
+        return fragment
+
+    def _context(self, options: RenderOptions, **extra: Any) -> dict[str, Any]:
         # todo make date optional
         # todo if font and code_font are different, fetch them in a single request
         # add family query param in the URL
-        return self.__template.render(
+        context = dict(
             filename=options.filename,
             date_=options.date_,
-            notebook=options.notebook,
             bg_color=self.bg_color,
-            styles=self._css_styles,
+            styles=self.css,
+            stylesheet_url=options.stylesheet_url,
             font=options.font,
             code_font=options.code_font,
         )
+        context.update(extra)
+        return context
+
+    def render_site_index(
+        self,
+        title: str,
+        pages: list[SitePage],
+        font: str,
+        code_font: str,
+        stylesheet_url: str | None = None,
+    ) -> str:
+        """
+        Renders the index page of a site, linking to all of its notebooks.
+        """
+        return self.__site_template.render(
+            filename=title,
+            bg_color=self.bg_color,
+            styles=self.css,
+            stylesheet_url=stylesheet_url,
+            font=font,
+            code_font=code_font,
+            pages=pages,
+        )
+
+    def render_stylesheet(self, font: str, code_font: str) -> str:
+        """
+        Renders the styles of the documents, the ones which are inlined when
+        there's no shared stylesheet.
+        """
+        return self.__stylesheet_template.render(
+            bg_color=self.bg_color, styles=self.css, font=font, code_font=code_font
+        )
+
+    def render_cells(self, options: RenderOptions) -> Iterator[str]:
+        """
+        Renders the cells of the notebook one by one, as they're consumed.
+        """
+        language = notebook_language(options.notebook.metadata)
+        return (
+            self.render_cell(cell, options.assets_url, language)
+            for cell in options.notebook.cells
+        )
+
+    def render(self, options: RenderOptions) -> str:
+        return self.__template.render(
+            self._context(options, cells=self.render_cells(options))
+        )
+
+    def stream(
+        self, options: RenderOptions, cells: Iterable[str] | None = None
+    ) -> Iterator[str]:
+        """
+        Renders the document piece by piece, cells are only rendered as the output is consumed.
+        `cells` are fragments which have already been rendered, by another renderer
+        for instance, as they're the same regardless of the theme.
+        """
+        # jinja yields lots of tiny strings, group them to cut down on writes.
+        # grouped by size rather than with jinja's count based buffering, which
+        # would join the fragments of several cells with huge outputs at once
+        buf = []
+        size = 0
+        if cells is None:
+            cells = self.render_cells(options)
+        context = self._context(options, cells=cells)
+        for chunk in self.__template.generate(context):
+            buf.append(chunk)
+            size += len(chunk)
+            if size >= STREAM_BUFFER_SIZE:
+                yield "".join(buf)
+                buf.clear()
+                size = 0
+
+        if buf:
+            yield "".join(buf)
+
+    def _chunks(
+        self, options: RenderOptions, cells_per_page: int, toc: list[Heading]
+    ) -> Iterator[list[tuple[str, str]]]:
+        """
+        Yields the (anchor, fragment) of the cells, `cells_per_page` at a time.
+        """
+        language = notebook_language(options.notebook.metadata)
+        chunk = []
+        for i, cell in enumerate(options.notebook.cells):
+            page = i // cells_per_page + 1
+            anchor = f"cell-{i + 1}"
+            if cell.cell_type == "markdown":
+                for level, title in self.headings(get_source(cell.source)):
+                    toc.append(Heading(level, title, page, anchor))
+            fragment = self.render_cell(cell, options.assets_url, language)
+            chunk.append((anchor, fragment))
+            if len(chunk) == cells_per_page:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
+    def render_pages(
+        self,
+        options: RenderOptions,
+        cells_per_page: int,
+        index_url: str,
+        toc: list[Heading],
+    ) -> Iterator[tuple[int, str]]:
+        """
+        Splits the notebook into pages of `cells_per_page` cells and yields the
+        number and the HTML of each one, rendering one page at a time. The headings
+        of the markdown cells are appended to `toc` along the way, for the index.
+
+        The assets and stylesheet URLs of `options` have to be relative to the
+        pages, which link each other by their `page_filename`.
+        """
+        chunks = self._chunks(options, cells_per_page, toc)
+        number = 1
+        chunk = next(chunks, None)
+        while chunk is not None:
+            # one page ahead, to know whether there's a next one to link
+            following = next(chunks, None)
+            yield number, self.__page_template.render(
+                self._context(
+                    options,
+                    cells=chunk,
+                    page=number,
+                    index_url=index_url,
+                    prev_url=page_filename(number - 1) if number > 1 else None,
+                    next_url=page_filename(number + 1) if following else None,
+                )
+            )
+            chunk = following
+            number += 1
+
+    def render_index(
+        self, options: RenderOptions, toc: list[Heading], page_urls: list[str]
+    ) -> str:
+        """
+        Renders the index page of a paginated document, a table of contents
+        linking to the headings in the pages.
+        """
+        return self.__index_template.render(
+            self._context(options, toc=toc, page_urls=page_urls)
+        )
@@ -1,3 +1,6 @@
+import json
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any, Dict, Optional
 
 from pydantic import BaseModel
@@ -11,8 +14,38 @@ from pygments.token import (
     Punctuation,
     String,
     Token,
+    string_to_tokentype,
 )
 
+from elara.cache import DiskCache, elara_version, make_key
+
+# (scope substring, PythonCodeColors field), a scope maps to the first entry it
+# contains, so the order matters. "keyword.operator" is shadowed by "keyword"
+SCOPE_FIELDS = (
+    ("comment", "comment"),
+    ("keyword", "keyword"),
+    ("string", "string"),
+    ("constant.numeric", "number"),
+    ("entity.name.function", "function_definition"),
+    ("variable", "variable"),
+    ("keyword.operator", "operator"),
+    ("punctuation", "punctuation"),
+    ("support.function.builtin", "builtin"),
+    ("entity.name.class", "class_definition"),
+)
+
+
+@lru_cache(maxsize=4096)
+def scope_field(scope: str) -> str | None:
+    """
+    Returns the `PythonCodeColors` field a TextMate scope maps to, if any. Themes
+    repeat the same scopes a lot, so lookups are memoized.
+    """
+    for substring, field in SCOPE_FIELDS:
+        if substring in scope:
+            return field
+    return None
+
 
 class ThemeColor(BaseModel):
     """Represents a generic color value from a VS Code theme."""
@@ -66,10 +99,9 @@ class Theme(BaseModel):
         None  # Optionally store the raw 'tokenColors' section
     )
 
-    @property
-    def styles(self):
+    def style_map(self) -> dict[str, str]:
         """
-        Returns a custom styles object that can be passed to the pygments formatter.
+        Returns the pygments style definitions, keyed by token type names.
         """
         colors = self.python_code
         default_color = self.raw_colors.get("editor.foreground", "#ffffff")
@@ -80,22 +112,85 @@ class Theme(BaseModel):
 
             return c
 
-        class CustomStyle(Style):
-            styles = {
-                Token: "",
-                Comment: color_or_default(colors.comment),
-                Keyword: color_or_default(colors.keyword),
-                String: color_or_default(colors.keyword),
-                Number: color_or_default(colors.number),
-                Name: default_color,
-                Name.Function: color_or_default(colors.function_definition),
-                Name.Class: color_or_default(colors.class_definition),
-                Name.Variable: color_or_default(colors.variable),
-                Operator: color_or_default(colors.operator),
-                Punctuation: color_or_default(colors.punctuation),
-            }
+        styles = {
+            Token: "",
+            Comment: color_or_default(colors.comment),
+            Keyword: color_or_default(colors.keyword),
+            String: color_or_default(colors.keyword),
+            Number: color_or_default(colors.number),
+            Name: default_color,
+            Name.Function: color_or_default(colors.function_definition),
+            Name.Class: color_or_default(colors.class_definition),
+            Name.Variable: color_or_default(colors.variable),
+            Operator: color_or_default(colors.operator),
+            Punctuation: color_or_default(colors.punctuation),
+        }
+        return {str(token): style for token, style in styles.items()}
+
+    @property
+    def styles(self):
+        """
+        Returns a custom styles object that can be passed to the pygments formatter.
+        """
+        return style_from_map(self.style_map())
+
+
+def style_from_map(style_map: dict[str, str]) -> type[Style]:
+    """
+    Builds a pygments style from definitions keyed by token type names.
+    """
 
-        return CustomStyle
+    class CustomStyle(Style):
+        styles = {
+            string_to_tokentype(token): style for token, style in style_map.items()
+        }
+
+    return CustomStyle
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledTheme:
+    """
+    A theme along with its stylesheet, everything the renderer needs from a
+    theme file. Stored in the theme cache so that it's only compiled once.
+    """
+
+    theme: Theme
+    css: str
+
+    def dumps(self) -> str:
+        return json.dumps({"theme": self.theme.model_dump(), "css": self.css})
+
+    @classmethod
+    def loads(cls, s: str) -> "CompiledTheme":
+        data = json.loads(s)
+        return cls(Theme.model_validate(data["theme"]), data["css"])
+
+
+def compile_theme(theme_json: dict[str, Any]) -> CompiledTheme:
+    from pygments.formatters import HtmlFormatter
+
+    theme = extract_theme_data(theme_json)
+    formatter = HtmlFormatter(cssclass="highlight", style=theme.styles)
+    return CompiledTheme(theme, formatter.get_style_defs(".highlight"))
+
+
+def load_theme(theme_src: str, cache: DiskCache | None = None) -> CompiledTheme:
+    """
+    Compiles the theme file contents, or loads them from `cache` if the same
+    file has been compiled before.
+    """
+    if cache is None:
+        return compile_theme(json.loads(theme_src))
+
+    key = make_key(elara_version(), theme_src)
+    cached = cache.get(key)
+    if cached is not None:
+        return CompiledTheme.loads(cached)
+
+    compiled = compile_theme(json.loads(theme_src))
+    cache.set(key, compiled.dumps())
+    return compiled
 
 
 def extract_theme_data(theme_json: dict[str, Any]) -> Theme:
@@ -127,61 +222,15 @@ def extract_theme_data(theme_json: dict[str, Any]) -> Theme:
             foreground = settings.get("foreground")
 
             if isinstance(scope, str):
-                if "comment" in scope:
-                    theme_data.python_code.comment = foreground
-                elif "keyword" in scope:
-                    theme_data.python_code.keyword = foreground
-                elif "string" in scope:
-                    theme_data.python_code.string = foreground
-                elif "constant.numeric" in scope:
-                    theme_data.python_code.number = foreground
-                elif "entity.name.function" in scope:
-                    theme_data.python_code.function_definition = (
-                        foreground  # Or differentiate call
-                    )
-                elif "variable" in scope:
-                    theme_data.python_code.variable = foreground
-                elif "keyword.operator" in scope:
-                    theme_data.python_code.operator = foreground
-                elif "punctuation" in scope:
-                    theme_data.python_code.punctuation = foreground
-                elif "support.function.builtin" in scope:
-                    theme_data.python_code.builtin = foreground
-                elif "entity.name.class" in scope:
-                    theme_data.python_code.class_definition = foreground
-                # Add more mappings as needed
+                field = scope_field(scope)
             elif isinstance(scope, list):
-                for s in scope:
-                    if "comment" in s:
-                        theme_data.python_code.comment = foreground
-                        break
-                    elif "keyword" in s:
-                        theme_data.python_code.keyword = foreground
-                        break
-                    elif "string" in s:
-                        theme_data.python_code.string = foreground
-                        break
-                    elif "constant.numeric" in s:
-                        theme_data.python_code.number = foreground
-                        break
-                    elif "entity.name.function" in s:
-                        theme_data.python_code.function_definition = foreground
-                        break
-                    elif "variable" in s:
-                        theme_data.python_code.variable = foreground
-                        break
-                    elif "keyword.operator" in s:
-                        theme_data.python_code.operator = foreground
-                        break
-                    elif "punctuation" in s:
-                        theme_data.python_code.punctuation = foreground
-                        break
-                    elif "support.function.builtin" in s:
-                        theme_data.python_code.builtin = foreground
-                        break
-                    elif "entity.name.class" in s:
-                        theme_data.python_code.class_definition = foreground
-                        break
+                # the first scope which maps to a field decides it
+                field = next(filter(None, map(scope_field, scope)), None)
+            else:
+                field = None
+
+            if field is not None:
+                setattr(theme_data.python_code, field, foreground)
 
     # Set default foreground for any None values in python_code
     for field in theme_data.python_code.__class__.model_fields:
@@ -193,8 +242,6 @@ def extract_theme_data(theme_json: dict[str, Any]) -> Theme:
 
 
 if __name__ == "__main__":
-    import json
-
     with open("./themes/vin-theme.json") as f:
         theme_json = json.load(f)
 
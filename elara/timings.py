@@ -0,0 +1,86 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from functools import wraps
+from typing import Any, Callable, Generator, TypeVar
+
+F = TypeVar("F", bound=Callable[..., str])
+
+# timings of the conversion running in this thread, filters report into it
+_current: ContextVar["Timings | None"] = ContextVar("elara_timings", default=None)
+
+
+@dataclass(slots=True)
+class Timings:
+    """
+    Measurements of a single conversion. Stage times are wall times in seconds,
+    the filter stages (highlight, markdown, ansi2html) are part of `render`.
+    """
+
+    file: str
+    stages: dict[str, float] = field(default_factory=dict)
+    # highlighting time of every code cell, in document order
+    highlight_per_cell: list[float] = field(default_factory=list)
+    bytes_in: int = 0
+    bytes_out: int = 0
+    cache_hit: bool = False
+    # event counts, like highlight cache hits
+    counters: dict[str, int] = field(default_factory=dict)
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Generator[None, None, None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    @contextmanager
+    def active(self) -> Generator["Timings", None, None]:
+        """
+        Makes these the timings that instrumented filters report into.
+        """
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def count(counter: str):
+    """
+    Increments `counter` of the active timings, if any.
+    """
+    timings = _current.get()
+    if timings is not None:
+        timings.counters[counter] = timings.counters.get(counter, 0) + 1
+
+
+def instrumented(stage: str, fn: F) -> F:
+    """
+    Wraps a jinja filter so that its time is added to `stage` of the active timings.
+    Costs a single context variable lookup when nothing is being measured.
+    """
+
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        timings = _current.get()
+        if timings is None:
+            return fn(*args, **kwargs)
+
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        timings.add(stage, elapsed)
+        if stage == "highlight":
+            timings.highlight_per_cell.append(elapsed)
+        return result
+
+    return wrapper  # type: ignore[return-value]
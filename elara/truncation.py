@@ -0,0 +1,129 @@
+import re
+from dataclasses import dataclass
+from typing import Any
+
+_ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+# the line boundaries of `str.splitlines`, besides \n
+_OTHER_LINE_BREAKS = re.compile("[\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]")
+
+
+def count_lines(text: str) -> int:
+    """
+    The number of lines `text.splitlines()` returns, without splitting it unless
+    it has line breaks other than \\n.
+    """
+    if _OTHER_LINE_BREAKS.search(text):
+        return len(text.splitlines())
+    if not text:
+        return 0
+    return text.count("\n") + (not text.endswith("\n"))
+
+
+@dataclass(frozen=True, slots=True)
+class OutputLimits:
+    """
+    Size limits of a single text output (stream, traceback or text/plain). Bigger
+    outputs keep their first and last lines, half of each limit for either end.
+    """
+
+    max_lines: int | None = None
+    max_bytes: int | None = None
+
+    def exceeded(self, source: Any) -> bool:
+        """
+        A quick check of whether the source would be truncated, without splitting it.
+        Lines are counted like `str.splitlines` does, so a list of lines is checked
+        the same as the text they make up.
+        """
+        if isinstance(source, list):
+            # lines of the list don't have to end with a line break
+            source = "".join(source)
+        n_lines = count_lines(source)
+        size = len(source)
+        if self.max_lines is not None and n_lines > self.max_lines:
+            return True
+        # characters are a lower bound of the size in bytes
+        if self.max_bytes is not None and size > self.max_bytes // 4:
+            return _utf8_size(source) > self.max_bytes
+        return False
+
+
+@dataclass(frozen=True, slots=True)
+class TruncatedText:
+    head: str
+    tail: str
+    # lines left out between the head and the tail
+    omitted_lines: int = 0
+    # the whole text, only set when it was truncated
+    full: str | None = None
+
+    @property
+    def truncated(self) -> bool:
+        return self.full is not None
+
+
+def _utf8_size(source: str | list[str]) -> int:
+    if isinstance(source, list):
+        return sum(len(line.encode("utf-8")) for line in source)
+    return len(source.encode("utf-8"))
+
+
+def _take(
+    lines: list[str], max_lines: float, max_bytes: float, from_end: bool = False
+) -> tuple[list[str], int]:
+    """
+    Takes lines from the start (or the end) of `lines` until either budget runs
+    out, a line which doesn't fit in the bytes left is cut short. Returns the
+    lines and how many of them are complete.
+    """
+    taken = []
+    size = 0
+    complete = 0
+    for line in reversed(lines) if from_end else lines:
+        if len(taken) >= max_lines:
+            break
+        data = line.encode("utf-8")
+        if size + len(data) > max_bytes:
+            left = int(max_bytes - size)
+            if left > 0:
+                part = data[-left:] if from_end else data[:left]
+                taken.append(part.decode("utf-8", "ignore"))
+            break
+        taken.append(line)
+        size += len(data)
+        complete += 1
+
+    if from_end:
+        taken.reverse()
+    return taken, complete
+
+
+def truncate_text(source: str | list[str], limits: OutputLimits) -> TruncatedText:
+    """
+    Truncates a text output to the limits, keeping its head and tail.
+    """
+    full = source if isinstance(source, str) else "".join(source)
+    if not limits.exceeded(source):
+        return TruncatedText(head=full, tail="")
+
+    lines = full.splitlines(keepends=True)
+    if limits.max_lines is None:
+        head_lines = tail_lines = float("inf")
+    else:
+        head_lines = (limits.max_lines + 1) // 2
+        tail_lines = limits.max_lines // 2
+    max_bytes = limits.max_bytes if limits.max_bytes is not None else float("inf")
+    head, head_complete = _take(lines, head_lines, max_bytes / 2)
+    tail, tail_complete = _take(
+        lines[len(head) :], tail_lines, max_bytes / 2, from_end=True
+    )
+    return TruncatedText(
+        head="".join(head),
+        tail="".join(tail),
+        omitted_lines=len(lines) - head_complete - tail_complete,
+        full=full,
+    )
+
+
+def strip_ansi(text: str) -> str:
+    return _ANSI_ESCAPE.sub("", text)
@@ -0,0 +1,134 @@
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from elara.cache import make_key
+from elara.converter import Converter
+from elara.fileutils import FileLike
+from elara.timings import Timings
+
+_NON_ALPHANUMERIC = re.compile(r"[^a-z0-9]+")
+
+
+@dataclass(frozen=True, slots=True)
+class Variant:
+    """
+    A theme and font combination a notebook is exported in.
+    """
+
+    theme_path: str
+    font: str
+    code_font: str
+
+
+def _slug(name: str) -> str:
+    return _NON_ALPHANUMERIC.sub("-", name.removeprefix("gf:").lower()).strip("-")
+
+
+def variant_labels(variants: list[Variant]) -> list[str]:
+    """
+    Short names of the variants for their file names: the theme, followed by the
+    fonts when the variants don't all use the same ones.
+    """
+    with_font = len({v.font for v in variants}) > 1
+    with_code_font = len({v.code_font for v in variants}) > 1
+    labels = []
+    for v in variants:
+        parts = [_slug(Path(v.theme_path).stem)]
+        if with_font:
+            parts.append(_slug(v.font))
+        if with_code_font:
+            parts.append(_slug(v.code_font))
+        labels.append("-".join(parts))
+    duplicates = sorted({label for label in labels if labels.count(label) > 1})
+    if duplicates:
+        raise ValueError(
+            f"Several variants would be named {', '.join(duplicates)}, "
+            "give each theme and font only once"
+        )
+    return labels
+
+
+def variant_path(path: str | os.PathLike, label: str) -> str:
+    """
+    `name.html` -> `name.<label>.html`
+    """
+    path = Path(path)
+    return str(path.with_name(f"{path.stem}.{label}{path.suffix}"))
+
+
+class VariantConverter:
+    """
+    Converts every notebook into several variants at once, reading, validating
+    and rendering its cells only once for all of them.
+
+    The first variant is written to the output path itself, the others next to
+    it as `name.<label>.html`. Likewise for the shared stylesheet, which holds the
+    styles of the theme. `options` are the ones of `Converter`, shared by all the
+    variants.
+    """
+
+    def __init__(self, variants: list[Variant], **options: Any):
+        if not variants:
+            raise ValueError("No variants to convert into")
+        # kept around so that worker processes can build an identical converter
+        self.options = dict(variants=variants, **options)
+        self.variants = variants
+        self.labels = variant_labels(variants)
+        stylesheet = options.pop("stylesheet", None)
+        self.converters = [
+            Converter(
+                v.theme_path,
+                v.font,
+                v.code_font,
+                stylesheet=self._variant_path(stylesheet, i),
+                **options,
+            )
+            for i, v in enumerate(variants)
+        ]
+
+    def _variant_path(self, path: str | None, index: int) -> str | None:
+        if path is None or index == 0:
+            return path
+        return variant_path(path, self.labels[index])
+
+    @property
+    def options_key(self) -> str:
+        return make_key(*(converter.options_key for converter in self.converters))
+
+    def outputs(self, output: str) -> list[str]:
+        """
+        Paths of the outputs of all the variants.
+        """
+        return [self._variant_path(output, i) for i in range(len(self.variants))]
+
+    def page_files(self, output: str) -> list[str]:
+        """
+        Paths of the pages of all the variants, see `Converter.page_files`.
+        """
+        return [
+            page
+            for converter, variant_output in zip(self.converters, self.outputs(output))
+            for page in converter.page_files(variant_output)
+        ]
+
+    def convert_to(
+        self,
+        file: FileLike,
+        output: str,
+        strict: bool = False,
+        timings: Timings | None = None,
+        filename: str | None = None,
+    ) -> bool:
+        """
+        Converts the given notebook into every variant, see `Converter.convert_to`.
+        """
+        return self.converters[0].convert_variants(
+            file,
+            list(zip(self.converters, self.outputs(output))),
+            strict,
+            timings,
+            filename,
+        )
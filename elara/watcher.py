@@ -0,0 +1,93 @@
+import os
+import time
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from elara.fileutils import expand_notebooks
+
+# (mtime in ns, size), a file is considered changed when either one changes
+FileStat = tuple[int, int]
+
+
+def stable_output_path(file: str | os.PathLike) -> Path:
+    """
+    Returns the output path for a watched notebook, which is overwritten on every
+    change instead of creating `name(1).html`, `name(2).html` and so on.
+    """
+    return Path(file).with_suffix(".html")
+
+
+class NotebookWatcher:
+    """
+    Watches notebooks, directories of notebooks and glob patterns for changes by
+    polling their mtime and size, which works the same on every platform and
+    filesystem.
+
+    A changed notebook is only reported once it has stayed unchanged for
+    `debounce` seconds, so that a burst of saves results in a single re-export.
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[str | os.PathLike],
+        interval: float = 0.5,
+        debounce: float = 0.3,
+    ):
+        self.paths = list(paths)
+        self.interval = interval
+        self.debounce = debounce
+
+    def scan(self) -> dict[Path, FileStat]:
+        stats = {}
+        for notebook, _ in expand_notebooks(self.paths):
+            try:
+                stat = notebook.stat()
+            except FileNotFoundError:
+                # deleted, or being replaced by an editor's atomic save
+                continue
+            stats[notebook] = (stat.st_mtime_ns, stat.st_size)
+        return stats
+
+    def outdated(self) -> list[Path]:
+        """
+        Returns the notebooks which are newer than their output, or have no output.
+        """
+        result = []
+        for notebook, (mtime, _) in self.scan().items():
+            try:
+                output_mtime = stable_output_path(notebook).stat().st_mtime_ns
+            except FileNotFoundError:
+                output_mtime = -1
+            if output_mtime < mtime:
+                result.append(notebook)
+        return sorted(result)
+
+    def changes(self) -> Iterator[list[Path]]:
+        """
+        Yields batches of changed notebooks, forever.
+        """
+        known = self.scan()
+        # notebook -> when it was last seen changing
+        pending: dict[Path, float] = {}
+        while True:
+            time.sleep(self.interval)
+            current = self.scan()
+            now = time.monotonic()
+            for notebook, stat in current.items():
+                if known.get(notebook) != stat:
+                    pending[notebook] = now
+            known = current
+
+            ready = [
+                notebook
+                for notebook, changed_at in pending.items()
+                if notebook in current and now - changed_at >= self.debounce
+            ]
+            for notebook in ready:
+                del pending[notebook]
+            # forget the notebooks deleted before they settled
+            for notebook in pending.keys() - current.keys():
+                del pending[notebook]
+
+            if ready:
+                yield sorted(ready)
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+from ansi2html import Ansi2HTMLConverter
+
+from elara.ansi import ansi_to_html, convert_ansi
+
+E = "\033["
+
+TEXTS = {
+    "plain": "no escapes at all",
+    "html": "a < b && c > d, <script>'\"</script>",
+    "html_colored": f"{E}31m<b>&amp;</b>{E}0m after <",
+    "basic": f"{E}1;32mok{E}0m and {E}91mbright{E}39m default",
+    "background": f"{E}44mblue{E}49m {E}103myellow",
+    "attributes": f"{E}1;3;4;9mall{E}22;23mless{E}24;29mnone",
+    "256_colors": f"{E}38;5;208morange{E}48;5;17mon navy{E}38;5;3mlow",
+    "256_grays": f"{E}38;5;232mdark{E}38;5;255mlight",
+    "truecolor": f"{E}38;2;255;100;0mfg{E}48;2;0;0;128mbg",
+    "colon_separated": f"{E}38:5:196mred{E}38:2:1:2:3mrgb",
+    "reset": f"{E}31mred{E}mdefault{E}1;31mbold red{E}0mplain",
+    "reset_in_sequence": f"{E}1;31;0;4munderlined",
+    "negative": f"{E}7mreversed{E}31;42mcolors{E}27mback",
+    "negative_default_colors": f"{E}7mno colors{E}0m",
+    "unterminated_span": f"{E}35mnever reset",
+    "malformed_sgr": f"{E}38;5mmissing{E}38;2;1mtoo few{E}38;9;1mbad kind",
+    "out_of_range": f"{E}38;5;300mbig{E}38;2;999;0;0mbigger{E}1000mcode",
+    "empty_parameters": f"{E};;1;;mbold{E};m",
+    "non_sgr_sequences": f"{E}2Jclear{E}Kline{E}10Gcolumn{E}31mred",
+    # left to ansi2html
+    "box_drawing": "\033(0lqqk\033(B done",
+    "cursor_up": f"progress 10%\n{E}1Aprogress 20%",
+    "lone_escape": "\033 not a sequence \033[ unterminated",
+    "traceback": (
+        f"{E}0;31m---------------------------------------------------------------"
+        f"{E}0m\n{E}0;31mZeroDivisionError{E}0m  Traceback\n"
+        f"{E}0;32m----> 1{E}0m 1 {E}0;34m/{E}0m 0\n"
+    ),
+}
+
+
+@pytest.fixture(scope="module")
+def ansi2html():
+    converter = Ansi2HTMLConverter(dark_bg=False)
+    return lambda text: converter.convert(text, full=False)
+
+
+@pytest.mark.parametrize("text", TEXTS.values(), ids=TEXTS.keys())
+def test_matches_ansi2html(ansi2html, text):
+    assert convert_ansi(text) == ansi2html(text)
+    assert ansi_to_html(text) == ansi2html(text)
+
+
+def test_random_sequences_match_ansi2html(ansi2html):
+    # random mixes of parameters, valid or not, with text and markup around them
+    rng = random.Random(0)
+    codes = [0, 1, 2, 3, 4, 5, 7, 8, 9, 22, 27, 31, 39, 42, 49, 95, 104, 38, 48, 5, 2]
+    pieces = ["x", "<", "&", " ", "\n"]
+    for _ in range(500):
+        text = ""
+        for _ in range(rng.randint(1, 8)):
+            params = ";".join(str(rng.choice(codes)) for _ in range(rng.randint(0, 5)))
+            text += f"{E}{params}m" + rng.choice(pieces) * rng.randint(0, 3)
+        assert convert_ansi(text) == ansi2html(text), repr(text)
@@ -0,0 +1,48 @@
+import json
+
+from elara.batch import convert_batch
+from elara.converter import Converter
+
+
+def write_notebook(path, n_cells: int):
+    cell = {"cell_type": "markdown", "metadata": {}, "source": "Some *text*"}
+    notebook = {
+        "cells": [cell] * n_cells,
+        "metadata": {},
+        "nbformat": 4,
+        "nbformat_minor": 5,
+    }
+    path.write_text(json.dumps(notebook))
+
+
+def test_results_in_job_order(tmp_path):
+    # the largest notebooks are started first, the last jobs here
+    jobs = []
+    for i, n_cells in enumerate([1, 10, 100, 1000]):
+        source = tmp_path / f"nb{i}.ipynb"
+        write_notebook(source, n_cells)
+        jobs.append((str(source), str(tmp_path / f"nb{i}.html")))
+    jobs.insert(2, (str(tmp_path / "missing.ipynb"), str(tmp_path / "missing.html")))
+
+    converter = Converter("vs", "Arial", "Consolas")
+    results = list(convert_batch(converter, jobs, n_jobs=2))
+
+    assert [(r.input_file, r.output_file) for r in results] == jobs
+    assert [r.ok for r in results] == [True, True, False, True, True]
+    assert all((tmp_path / f"nb{i}.html").exists() for i in range(4))
+
+
+def test_results_in_job_order_within_memory_budget(tmp_path):
+    jobs = []
+    for i, n_cells in enumerate([500, 5, 50]):
+        source = tmp_path / f"nb{i}.ipynb"
+        write_notebook(source, n_cells)
+        jobs.append((str(source), str(tmp_path / f"nb{i}.html")))
+
+    converter = Converter("vs", "Arial", "Consolas")
+    # the largest notebook doesn't fit, it's converted in low memory mode
+    max_memory = (tmp_path / "nb1.ipynb").stat().st_size * 100
+    results = list(convert_batch(converter, jobs, n_jobs=2, max_memory=max_memory))
+
+    assert [r.input_file for r in results] == [source for source, _ in jobs]
+    assert all(r.ok for r in results)
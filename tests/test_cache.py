@@ -0,0 +1,86 @@
+import pytest
+
+from elara.cache import (
+    SIZE_LOG,
+    SIZE_LOG_MAX_LINES,
+    DiskCache,
+    content_key,
+    make_key,
+)
+
+
+def disk_size(cache: DiskCache) -> int:
+    return sum(size for _, _, size in cache._entries())
+
+
+def test_get_and_set(tmp_path):
+    cache = DiskCache(tmp_path)
+    assert cache.get(make_key("a")) is None
+    cache.set(make_key("a"), "value")
+    assert cache.get(make_key("a")) == "value"
+
+
+def test_size_is_read_from_the_log(tmp_path, monkeypatch):
+    cache = DiskCache(tmp_path)
+    for i in range(10):
+        cache.set(make_key(str(i)), "x" * 10)
+    # an entry replaced with a smaller one
+    cache.set(make_key("0"), "x")
+
+    def walk():
+        pytest.fail("the cache was walked")
+
+    reopened = DiskCache(tmp_path)
+    monkeypatch.setattr(reopened, "_entries", walk)
+    reopened.set(make_key("new"), "y")
+    assert reopened._size == disk_size(cache) == 92
+
+
+def test_size_log_is_compacted(tmp_path):
+    cache = DiskCache(tmp_path)
+    for i in range(SIZE_LOG_MAX_LINES + 1):
+        cache.set(make_key(str(i)), "x")
+
+    reopened = DiskCache(tmp_path)
+    reopened.set(make_key("new"), "x")
+    assert len((tmp_path / SIZE_LOG).read_text().split()) == 2
+    assert reopened._size == disk_size(cache)
+
+
+def test_eviction(tmp_path):
+    cache = DiskCache(tmp_path, max_size=100)
+    for i in range(20):
+        cache.set(make_key(str(i)), "x" * 10)
+    assert disk_size(cache) <= 100
+    assert cache._size == disk_size(cache)
+    assert DiskCache(tmp_path)._read_size() == disk_size(cache)
+
+
+def code_cell(**changes):
+    from elara.fast_notebook import build_cell
+
+    cell = {
+        "cell_type": "code",
+        "id": "a",
+        "metadata": {},
+        "source": "print(1)",
+        "execution_count": 1,
+        "outputs": [{"output_type": "stream", "name": "stdout", "text": "1\n"}],
+    }
+    return build_cell({**cell, **changes})
+
+
+def test_content_key():
+    exclude = {"id", "metadata"}
+    key = content_key(code_cell(), exclude)
+    assert key == content_key(code_cell(id="b", metadata={"x": 1}), exclude)
+    assert key != content_key(code_cell(source="print(2)"), exclude)
+    assert key != content_key(code_cell(execution_count=None), exclude)
+    # the same strings, split up differently
+    assert content_key(["ab", "c"]) != content_key(["a", "bc"])
+
+
+def test_content_key_max_size():
+    cell = code_cell(source="x" * 1000)
+    assert content_key(cell, max_size=999) is None
+    assert content_key(cell, max_size=2000) is not None
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from elara.converter import Converter
+
+VALID_CELL = {"cell_type": "markdown", "metadata": {}, "source": "# Title"}
+# a code cell missing its outputs and execution count
+INVALID_CELL = {"cell_type": "code", "metadata": {}, "source": "1 + 1"}
+
+
+def write_notebook(path, cells):
+    notebook = {"cells": cells, "metadata": {}, "nbformat": 4, "nbformat_minor": 5}
+    path.write_text(json.dumps(notebook))
+
+
+@pytest.mark.parametrize("low_memory", [False, True], ids=["full", "low_memory"])
+def test_failed_conversion_keeps_previous_output(tmp_path, low_memory):
+    # in low memory mode, the invalid cell is only found halfway through rendering
+    source = tmp_path / "nb.ipynb"
+    write_notebook(source, [VALID_CELL] * 3 + [INVALID_CELL])
+    output = tmp_path / "nb.html"
+    output.write_text("previous")
+
+    converter = Converter("vs", "Arial", "Consolas", low_memory=low_memory)
+    assert not converter.convert_to(source, output)
+    assert output.read_text() == "previous"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["nb.html", "nb.ipynb"]
+
+
+def test_failed_conversion_writes_nothing(tmp_path):
+    source = tmp_path / "nb.ipynb"
+    write_notebook(source, [VALID_CELL, INVALID_CELL])
+
+    converter = Converter("vs", "Arial", "Consolas", low_memory=True)
+    assert not converter.convert_to(source, tmp_path / "nb.html")
+    assert [p.name for p in tmp_path.iterdir()] == ["nb.ipynb"]
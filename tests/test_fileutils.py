@@ -0,0 +1,47 @@
+import os
+import stat
+
+import pytest
+
+from elara import fileutils
+from elara.fileutils import open_atomic, write_atomic
+
+
+@pytest.fixture
+def umask_022():
+    previous = os.umask(0o022)
+    fileutils._umask.cache_clear()
+    yield
+    os.umask(previous)
+    fileutils._umask.cache_clear()
+
+
+def mode(path) -> int:
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+@pytest.mark.skipif(os.name == "nt", reason="no unix permissions")
+def test_new_file_follows_umask(tmp_path, umask_022):
+    path = tmp_path / "image.png"
+    write_atomic(path, b"data")
+    assert path.read_bytes() == b"data"
+    assert mode(path) == 0o644
+
+
+@pytest.mark.skipif(os.name == "nt", reason="no unix permissions")
+def test_replaced_file_keeps_its_mode(tmp_path, umask_022):
+    path = tmp_path / "page.html"
+    path.write_text("old")
+    path.chmod(0o640)
+    write_atomic(path, b"new")
+    assert path.read_bytes() == b"new"
+    assert mode(path) == 0o640
+
+
+def test_failure_leaves_nothing_behind(tmp_path):
+    path = tmp_path / "out.html"
+    with pytest.raises(RuntimeError):
+        with open_atomic(path) as f:
+            f.write("partial")
+            raise RuntimeError
+    assert list(tmp_path.iterdir()) == []
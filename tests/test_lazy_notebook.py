@@ -0,0 +1,68 @@
+import io
+import json
+
+import pytest
+
+from elara import lazy_notebook
+from elara.lazy_notebook import LazyNotebook, _JSONScanner
+
+VALUES = [
+    0,
+    -1.5e3,
+    "",
+    'a "quoted" \\ string ] }',
+    "\\\\",
+    "\\" * 5 + '"' + "\\" * 4,
+    [],
+    {},
+    [1, [2, [3, {"a": "]"}]], "\\"],
+    {"nested": {"list": ["{", "}", "[", "]"], "escaped": '\\"'}},
+    True,
+    None,
+]
+
+
+@pytest.fixture(params=[1, 3, 1024], ids=lambda size: f"chunk{size}")
+def chunk_size(request, monkeypatch):
+    # tiny chunks, so that values and escapes straddle the chunk boundaries
+    monkeypatch.setattr(lazy_notebook, "CHUNK_SIZE", request.param)
+    return request.param
+
+
+@pytest.mark.parametrize("value", VALUES)
+def test_skip(chunk_size, value):
+    scanner = _JSONScanner(io.StringIO(json.dumps([value, "after"])))
+    scanner.expect("[")
+    scanner.skip()
+    scanner.expect(",")
+    assert scanner.value() == "after"
+
+
+def test_skip_unterminated(chunk_size):
+    scanner = _JSONScanner(io.StringIO('["abc", [1'))
+    scanner.expect("[")
+    scanner.skip()
+    scanner.expect(",")
+    with pytest.raises(json.JSONDecodeError):
+        scanner.skip()
+
+
+def test_items_skip(chunk_size):
+    document = {"cells": [{"source": "]}"}] * 3, "metadata": {"a": 1}, "n": 4}
+    scanner = _JSONScanner(io.StringIO(json.dumps(document)))
+    assert list(scanner.items("cells", skip={"cells"})) == [
+        ("metadata", {"a": 1}),
+        ("n", 4),
+    ]
+
+
+def test_metadata_after_cells(tmp_path, chunk_size):
+    path = tmp_path / "nb.ipynb"
+    notebook = {
+        "cells": [{"cell_type": "markdown", "metadata": {}, "source": '"[{\\'}],
+        "metadata": {"kernelspec": {"language": "r"}},
+        "nbformat": 4,
+        "nbformat_minor": 5,
+    }
+    path.write_text(json.dumps(notebook))
+    assert LazyNotebook(path).metadata == notebook["metadata"]
@@ -0,0 +1,39 @@
+from pathlib import Path
+
+from elara.manifest import MANIFEST_NAME, Manifest
+
+OUTPUTS = [Path("nb.html"), Path("nb.monokai.html")]
+
+
+def export(tmp_path: Path) -> tuple[Manifest, Path]:
+    source = tmp_path / "nb.ipynb"
+    source.write_text("{}")
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    for output in OUTPUTS:
+        (out_dir / output).write_text("<html></html>")
+        (out_dir / (output.name + ".gz")).write_bytes(b"")
+    (out_dir / "nb.monokai_pages").mkdir()
+
+    manifest = Manifest(out_dir, "key")
+    manifest.record(OUTPUTS[0], manifest.entry_for(source, OUTPUTS))
+    manifest.save()
+    return Manifest.load(out_dir, "key"), source
+
+
+def test_up_to_date_needs_every_variant(tmp_path):
+    manifest, source = export(tmp_path)
+    assert manifest.is_up_to_date(OUTPUTS[0], source)
+
+    (manifest.out_dir / OUTPUTS[1]).unlink()
+    assert not manifest.is_up_to_date(OUTPUTS[0], source)
+
+
+def test_orphans_are_removed_with_their_variants(tmp_path):
+    manifest, source = export(tmp_path)
+    source.unlink()
+
+    removed = manifest.remove_orphans()
+    assert removed == [manifest.out_dir / output for output in OUTPUTS]
+    assert not manifest.entries
+    assert [path.name for path in manifest.out_dir.iterdir()] == [MANIFEST_NAME]
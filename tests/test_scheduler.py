@@ -0,0 +1,98 @@
+import pytest
+
+from elara.scheduler import (
+    LOW_MEMORY_ESTIMATE,
+    MEMORY_PER_BYTE,
+    ScheduledJob,
+    Scheduler,
+    parse_size,
+    plan_jobs,
+)
+
+MB = 1024 * 1024
+
+
+def job(index: int, memory: int) -> ScheduledJob:
+    return ScheduledJob(index, f"{index}.ipynb", f"{index}.html", memory, False, memory)
+
+
+@pytest.mark.parametrize(
+    "value, size",
+    [
+        ("1500000", 1500000),
+        ("512M", 512 * MB),
+        ("4GB", 4096 * MB),
+        ("1.5GiB", 1536 * MB),
+    ],
+)
+def test_parse_size(value, size):
+    assert parse_size(value) == size
+
+
+def test_parse_invalid_size():
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_largest_first_without_budget():
+    scheduler = Scheduler([job(0, 1), job(1, 3), job(2, 2)])
+    assert [scheduler.take().index for _ in range(3)] == [1, 2, 0]
+    assert scheduler.take() is None
+
+
+def test_oversized_job_runs_alone():
+    scheduler = Scheduler([job(0, 10), job(1, 500), job(2, 20)], max_memory=100)
+    oversized = scheduler.take()
+    assert oversized.index == 1
+    # nothing else fits next to it
+    assert scheduler.take() is None
+    scheduler.finished(oversized)
+    assert [scheduler.take().index, scheduler.take().index] == [2, 0]
+
+
+def test_smaller_job_fills_idle_slots():
+    scheduler = Scheduler([job(0, 60), job(1, 50), job(2, 30)], max_memory=100)
+    assert scheduler.take().index == 0
+    # the next largest doesn't fit next to it, a smaller one does
+    assert scheduler.take().index == 2
+    assert scheduler.take() is None
+    assert scheduler.in_flight == 90
+
+
+def test_finished_frees_the_budget():
+    scheduler = Scheduler([job(0, 60), job(1, 50)], max_memory=100)
+    first = scheduler.take()
+    assert scheduler.take() is None
+    scheduler.finished(first)
+    assert scheduler.take().index == 1
+    assert scheduler.running == 1
+    assert scheduler.in_flight == 50
+
+
+def test_plan_jobs_routes_large_notebooks_to_low_memory(tmp_path):
+    small, large = tmp_path / "small.ipynb", tmp_path / "large.ipynb"
+    small.write_bytes(b"x" * 1000)
+    large.write_bytes(b"x" * 100_000)
+    jobs = [(str(small), "small.html"), (str(large), "large.html")]
+
+    planned = plan_jobs(jobs, max_memory=10_000 * MEMORY_PER_BYTE)
+    assert [(j.index, j.size, j.low_memory) for j in planned] == [
+        (0, 1000, False),
+        (1, 100_000, True),
+    ]
+    assert planned[0].memory == 1000 * MEMORY_PER_BYTE
+    assert planned[1].memory == min(100_000 * MEMORY_PER_BYTE, LOW_MEMORY_ESTIMATE)
+
+
+def test_plan_jobs_low_memory_everywhere(tmp_path):
+    notebook = tmp_path / "nb.ipynb"
+    notebook.write_bytes(b"x" * 10)
+    planned = plan_jobs([(str(notebook), "nb.html")], low_memory=True)
+    assert planned[0].low_memory
+
+
+def test_plan_jobs_missing_file():
+    (planned,) = plan_jobs([("missing.ipynb", "missing.html")], max_memory=1)
+    # the conversion reports it
+    assert planned.size == 0
+    assert not planned.low_memory
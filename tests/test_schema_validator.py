@@ -0,0 +1,35 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from elara.schema_validator import ValidationLevel, validate_notebook
+
+ROOT = Path(__file__).resolve().parent.parent
+
+NOTEBOOK = {"cells": [], "metadata": {}, "nbformat": 4, "nbformat_minor": 5}
+
+
+def test_validate_in_a_fresh_process():
+    # nothing else imported beforehand, which could load what validation needs
+    code = (
+        "from elara.schema_validator import ValidationLevel, validate_notebook\n"
+        f"validate_notebook({NOTEBOOK!r}, ValidationLevel.full)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+
+
+@pytest.mark.parametrize("level", list(ValidationLevel))
+def test_valid_notebook(level):
+    validate_notebook(NOTEBOOK, level)
+
+
+def test_invalid_notebook():
+    from jsonschema import ValidationError
+
+    with pytest.raises(ValidationError):
+        validate_notebook({**NOTEBOOK, "nbformat": 3}, ValidationLevel.full)
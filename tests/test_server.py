@@ -0,0 +1,78 @@
+import gc
+import io
+import json
+import threading
+import time
+import weakref
+
+from elara.server import ConverterPool, Server
+
+
+class Responses(io.StringIO):
+    """
+    Collects the responses, and signals once `expected` of them came in.
+    """
+
+    def __init__(self, expected: int):
+        super().__init__()
+        self.expected = expected
+        self.received = threading.Event()
+
+    def write(self, text: str) -> int:
+        written = super().write(text)
+        if self.getvalue().count("\n") >= self.expected:
+            self.received.set()
+        return written
+
+
+def ping(request_id: int) -> str:
+    return json.dumps({"jsonrpc": "2.0", "id": request_id, "method": "ping"})
+
+
+def test_answers_every_request_before_shutdown():
+    server = Server(ConverterPool(), workers=4)
+    lines = [ping(i) for i in range(20)] + ['{"id": 20, "method": "shutdown"}']
+    wfile = io.StringIO()
+    server.serve_stream(lines, wfile)
+
+    responses = [json.loads(line) for line in wfile.getvalue().splitlines()]
+    # the shutdown is answered last, once everything else is
+    assert responses[-1] == {"jsonrpc": "2.0", "id": 20, "result": None}
+    assert sorted(r["id"] for r in responses[:-1]) == list(range(20))
+    assert all(r["result"] == "pong" for r in responses[:-1])
+    assert server.stopped.is_set()
+
+
+def test_forgets_answered_requests():
+    server = Server(ConverterPool(), workers=2)
+    futures = []
+    submit = server.executor.submit
+
+    def tracked_submit(*args):
+        future = submit(*args)
+        futures.append(weakref.ref(future))
+        return future
+
+    server.executor.submit = tracked_submit
+
+    def alive_futures() -> int:
+        gc.collect()
+        return sum(future() is not None for future in futures)
+
+    wfile = Responses(expected=50)
+
+    def requests():
+        for i in range(50):
+            yield ping(i)
+        # the connection is still open, but everything has been answered
+        assert wfile.received.wait(5)
+        # the last one is still referenced by the loop submitting them, and the
+        # futures finish right after writing their response
+        deadline = time.monotonic() + 5
+        while alive_futures() > 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert alive_futures() <= 1
+        yield ping(50)
+
+    server.serve_stream(requests(), wfile)
+    assert wfile.getvalue().count("\n") == 51
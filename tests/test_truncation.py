@@ -0,0 +1,66 @@
+import pytest
+
+from elara.truncation import OutputLimits, count_lines, truncate_text
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["", "a", "a\n", "a\nb", "a\nb\n", "\n\n", "a\r\nb\rc\n", "a\x0cb "],
+)
+def test_count_lines(text):
+    assert count_lines(text) == len(text.splitlines())
+
+
+def test_exact_limit():
+    limits = OutputLimits(max_lines=2)
+    result = truncate_text("a\nb", limits)
+    assert not result.truncated
+    assert result.head == "a\nb"
+
+
+@pytest.mark.parametrize("source", ["a\nb\n", ["a\n", "b\n"]])
+def test_trailing_newline(source):
+    limits = OutputLimits(max_lines=2)
+    assert not limits.exceeded(source)
+    result = truncate_text(source, limits)
+    assert not result.truncated
+    assert result.head == "a\nb\n"
+    assert result.omitted_lines == 0
+
+
+def test_string_and_list_agree():
+    limits = OutputLimits(max_lines=3)
+    lines = [f"line {i}\n" for i in range(10)]
+    assert truncate_text(lines, limits) == truncate_text("".join(lines), limits)
+
+
+def test_head_and_tail():
+    text = "".join(f"{i}\n" for i in range(10))
+    result = truncate_text(text, OutputLimits(max_lines=5))
+    assert result.truncated
+    assert result.head == "0\n1\n2\n"
+    assert result.tail == "8\n9\n"
+    assert result.omitted_lines == 5
+    assert result.full == text
+
+
+def test_byte_cut():
+    text = "x" * 100 + "\n" + "y" * 100 + "\n"
+    result = truncate_text(text, OutputLimits(max_bytes=20))
+    assert result.truncated
+    # half of the budget for either end, the lines being cut short
+    assert result.head == "x" * 10
+    assert result.tail == "y" * 9 + "\n"
+    assert result.omitted_lines == 2
+
+
+def test_byte_cut_keeps_characters_whole():
+    text = "é" * 50
+    result = truncate_text(text, OutputLimits(max_bytes=11))
+    assert result.truncated
+    assert result.head == "é" * 2
+    assert len(result.head.encode("utf-8")) <= 11 / 2
+
+
+def test_within_byte_limit():
+    assert not truncate_text("é" * 5, OutputLimits(max_bytes=10)).truncated
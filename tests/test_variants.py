@@ -0,0 +1,27 @@
+import pytest
+import typer
+
+from elara.main import build_converter, plan_variants
+from elara.variants import Variant, variant_labels
+
+
+def test_labels_only_name_differing_fonts():
+    variants = plan_variants(["vs", "monokai"], ["Arial"], ["Consolas", "Fira Code"])
+    assert variant_labels(variants) == [
+        "vs-consolas",
+        "vs-fira-code",
+        "monokai-consolas",
+        "monokai-fira-code",
+    ]
+
+
+def test_duplicate_labels():
+    variants = [Variant("vs", "Arial", "Consolas")] * 2
+    with pytest.raises(ValueError, match="named vs"):
+        variant_labels(variants)
+
+
+def test_duplicate_variants_are_a_bad_parameter():
+    variants = plan_variants(["vs", "vs"], ["Arial"], ["Consolas"])
+    with pytest.raises(typer.BadParameter, match="named vs"):
+        build_converter(variants)